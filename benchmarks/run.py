@@ -0,0 +1,220 @@
+"""
+Benchmarks gensql.py over the schemas in schema_inputs, at several sizes, across
+filetypes and flags. Each case is run in its own process, timed from outside it,
+and its peak RSS taken from wait4(). The results can be saved as a baseline, and are
+compared to it on later runs, flagging any case that's slower, or uses more
+memory, by more than a threshold.
+
+    python3 benchmarks/run.py --save-baseline   # e.g. on the main branch
+    python3 benchmarks/run.py                   # then on a change, to compare
+
+Runs offline, and only needs what gensql itself needs. Baselines are specific
+to the host they were made on, so compare on the same one.
+"""
+
+import argparse
+from datetime import datetime, timezone
+import json
+import os
+from pathlib import Path
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_BASELINE = ROOT / "benchmarks" / "baseline.json"
+DEFAULT_SIZES = [10000, 100000]
+DEFAULT_THRESHOLD = 0.1
+FILETYPES = ["csv", "mysql", "postgres"]
+# broken.json is meant to fail validation
+EXCLUDED_SCHEMAS = {"broken.json"}
+
+
+def make_cases(
+    schemas: list[str], sizes: list[int], filetypes: list[str]
+) -> list[tuple[str, list[str]]]:
+    """
+    Returns (name, args) of each case: every schema, size, and filetype, by
+    default and with each of --random and --fixed-length, plus --no-chunk for
+    the SQL filetypes.
+    """
+    cases = []
+    for schema in schemas:
+        for num in sizes:
+            for filetype in filetypes:
+                flag_sets = [[], ["--random"], ["--fixed-length"]]
+                if filetype != "csv":
+                    flag_sets.append(["--no-chunk"])
+                for flags in flag_sets:
+                    args = ["-i", f"schema_inputs/{schema}", "-n", str(num)]
+                    args += ["-f", filetype, *flags]
+                    cases.append((" ".join([schema, *args[2:]]), args))
+    return cases
+
+
+def run_case(args: list[str], repeat: int) -> dict:
+    """
+    Runs gensql.py with args repeat times, keeping the best rows/sec and the
+    lowest peak RSS, as noise only ever makes either of them worse. Rows/sec is
+    over the wall time of the whole process, and the peak RSS is that of it or
+    any of its workers, so nothing is measured from inside the run, as the
+    profiler behind --metrics would slow it down. The output is written to a
+    temporary directory, rather than schema_outputs.
+    """
+    num = int(args[args.index("-n") + 1])
+    best = {"status": "ok", "rows_per_second": 0.0, "peak_rss_bytes": None}
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as tmp, tempfile.TemporaryFile() as err:
+            cmd = [sys.executable, "gensql.py", *args, "-o", "gensql_bench", "-q"]
+            cmd += ["--output-dir", tmp]
+            start = time.perf_counter()
+            proc = subprocess.Popen(
+                cmd, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=err
+            )
+            # unlike RUSAGE_CHILDREN, this is only for this process and its workers
+            _, status, usage = os.wait4(proc.pid, 0)
+            seconds = time.perf_counter() - start
+            proc.returncode = os.waitstatus_to_exitcode(status)
+            if proc.returncode:
+                err.seek(0)
+                lines = err.read().decode().strip().splitlines() or ["no output"]
+                return {"status": "failed", "error": lines[-1]}
+        # ru_maxrss is in KiB on Linux, but in bytes on macOS
+        rss = usage.ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+        best["rows_per_second"] = max(best["rows_per_second"], num / seconds)
+        best["peak_rss_bytes"] = min(best["peak_rss_bytes"] or rss, rss)
+    return best
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    Returns the names of the cases that regressed from the baseline: slower,
+    or with a larger peak RSS, by more than threshold, or now failing.
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None or base["status"] != "ok":
+            continue
+        if (
+            result["status"] != "ok"
+            or result["rows_per_second"] < base["rows_per_second"] * (1 - threshold)
+            or result["peak_rss_bytes"] > base["peak_rss_bytes"] * (1 + threshold)
+        ):
+            regressions.append(name)
+    return regressions
+
+
+def _change(new: float, old: float | None) -> str:
+    return f"{new / old - 1:+.1%}" if old else ""
+
+
+def print_results(results: dict, baseline: dict, regressions: list[str]):
+    width = max(len(name) for name in results)
+    print(
+        f"{'case':<{width}}  {'rows/s':>10}  {'change':>7}  {'peak MiB':>8}  "
+        f"{'change':>7}"
+    )
+    for name, result in results.items():
+        if result["status"] != "ok":
+            print(f"{name:<{width}}  failed: {result['error']}")
+            continue
+        base = baseline.get(name) or {}
+        if base.get("status") != "ok":
+            base = {}
+        print(
+            f"{name:<{width}}  {result['rows_per_second']:>10,.0f}  "
+            f"{_change(result['rows_per_second'], base.get('rows_per_second')):>7}  "
+            f"{result['peak_rss_bytes'] / 1024**2:>8,.1f}  "
+            f"{_change(result['peak_rss_bytes'], base.get('peak_rss_bytes')):>7}"
+            f"{'  REGRESSION' if name in regressions else ''}"
+        )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument(
+        "--baseline",
+        type=Path,
+        default=DEFAULT_BASELINE,
+        help="The baseline to compare to, or to save with --save-baseline",
+    )
+    parser.add_argument("--filetypes", nargs="+", choices=FILETYPES, default=FILETYPES)
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Runs per case, keeping the best - defaults to 3",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        dest="save_baseline",
+        help="Save the results as the baseline, instead of comparing to it",
+    )
+    parser.add_argument(
+        "--schemas",
+        nargs="+",
+        help="Schemas in schema_inputs to run - defaults to all of them",
+    )
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="The fraction rows/sec can drop, or peak RSS grow, by before a case "
+        f"is flagged - defaults to {DEFAULT_THRESHOLD}",
+    )
+    args = parser.parse_args(argv)
+
+    schemas = args.schemas or sorted(
+        p.name
+        for p in (ROOT / "schema_inputs").glob("*.json")
+        if p.name not in EXCLUDED_SCHEMAS
+    )
+    schemas = [s if s.endswith(".json") else f"{s}.json" for s in schemas]
+    results = {}
+    for name, case_args in make_cases(schemas, args.sizes, args.filetypes):
+        print(f"running {name}", file=sys.stderr)
+        results[name] = run_case(case_args, args.repeat)
+
+    baseline = {}
+    if not args.save_baseline and args.baseline.exists():
+        saved = json.loads(args.baseline.read_text())
+        if saved["host"] != socket.gethostname():
+            print(
+                f"WARNING: the baseline was made on {saved['host']}, so isn't "
+                "comparable with this host",
+                file=sys.stderr,
+            )
+        baseline = saved["results"]
+    regressions = compare(results, baseline, args.threshold)
+    print_results(results, baseline, regressions)
+    if args.save_baseline:
+        args.baseline.write_text(
+            json.dumps(
+                {
+                    "host": socket.gethostname(),
+                    "python": platform.python_version(),
+                    "created": datetime.now(timezone.utc).isoformat(),
+                    "results": results,
+                },
+                indent=4,
+            )
+            + "\n"
+        )
+        print(f"saved the baseline to {args.baseline}", file=sys.stderr)
+    if regressions:
+        print(
+            f"{len(regressions)} case(s) regressed by more than {args.threshold:.0%}",
+            file=sys.stderr,
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -22,6 +22,40 @@ class BinaryTypeInCSVError(BaseError):
         return (BinaryTypeInCSVError, self.msg)
 
 
+class CheckpointError(BaseError):
+    """A run can't be resumed from its checkpoint"""
+
+    def __init__(self, checkpoint_dir, reason, msg=None):
+        self.checkpoint_dir = checkpoint_dir
+        self.reason = reason
+        if msg:
+            self.msg = msg
+        else:
+            self.msg = (
+                f"unable to resume from the checkpoint in {checkpoint_dir}: {reason}"
+            )
+        super(CheckpointError, self).__init__(self.msg)
+
+    def __reduce__(self):
+        return (CheckpointError, self.msg)
+
+
+class DuplicateValueError(BaseError):
+    """A unique column that can't repeat a value did, which is a bug"""
+
+    def __init__(self, col_name, value, msg=None):
+        self.col_name = col_name
+        self.value = value
+        if msg:
+            self.msg = msg
+        else:
+            self.msg = f"column {col_name} repeated the unique value {value}"
+        super(DuplicateValueError, self).__init__(self.msg)
+
+    def __reduce__(self):
+        return (DuplicateValueError, self.msg)
+
+
 class SchemaValidationError(BaseError):
     """The provided schema is incorrectly formatted"""
 
@@ -110,6 +144,22 @@ class TooManyRowsError(BaseError):
         return (TooManyRowsError, self.msg)
 
 
+class UnsupportedCopyTypeError(BaseError):
+    """A column's type can't be written in the binary COPY format"""
+
+    def __init__(self, col_name, col_type, msg=None):
+        self.col_name = col_name
+        self.col_type = col_type
+        if msg:
+            self.msg = msg
+        else:
+            self.msg = f"column {col_name} of type {col_type} is not supported with --copy-binary"
+        super(UnsupportedCopyTypeError, self).__init__(self.msg)
+
+    def __reduce__(self):
+        return (UnsupportedCopyTypeError, self.msg)
+
+
 class UnsupportedRDBMSError(BaseError):
     """The selected RDBMS is not supported"""
 
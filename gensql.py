@@ -3,7 +3,9 @@ from textwrap import dedent
 import sys
 
 from gensql.generator import Generator
+from gensql.pack import ReferencePack
 from gensql.runner import Runner
+from gensql.timestamps import Timestamps
 from gensql.validator import Validator
 
 from exceptions.exceptions import (
@@ -12,6 +14,7 @@ from exceptions.exceptions import (
 )
 
 from utilities import utilities
+from utilities.constants import DATES_CACHE, REFERENCE_PACK
 
 if __name__ == "__main__":
     warnings = []
@@ -53,27 +56,37 @@ if __name__ == "__main__":
             warnings.append(f"--filetype {args.filetype}")
 
         try:
-            filename = "content/dates.txt"
-            with open(filename, f"{'w' if args.force else 'x'}") as f:
-                dates = [x + "\n" for x in g.make_dates(args.num)]
-                f.writelines(dates)
+            filename = DATES_CACHE
+            with open(filename, f"{'w' if args.force else 'x'}b") as f:
+                Timestamps(g.start_date, g.end_date).write_cache(f, args.num)
             if warnings:
                 for w in warnings:
                     print(f"INFO: ignoring option {w} for datetime creation")
-            print(f"INFO: {args.num} datetimes created at content/dates.txt")
+            print(f"INFO: {args.num} datetimes created at {DATES_CACHE}")
             raise SystemExit(0)
         except FileExistsError:
             raise OverwriteFileError(filename) from None
         except PermissionError:
             raise OutputFilePermissionError(filename) from None
+    elif args.build_pack:
+        try:
+            filename = ReferencePack.build()
+        except PermissionError:
+            raise OutputFilePermissionError(REFERENCE_PACK) from None
+        print(f"INFO: reference data packed into {filename}")
+        raise SystemExit(0)
     try:
-        tbl_name = args.table or args.output or PurePath(args.input).stem
+        # with -o -, there's no filename to name the table after
+        output = args.output if args.output != "-" else None
+        tbl_name = args.table or output or PurePath(args.input).stem
     except TypeError:
         tbl_name = "gensql"
     schema_dict = v.parse_schema()
     schema_dict = utils.lowercase_schema(schema_dict)
     v.validate_schema(schema_dict)
-    tbl_create, tbl_cols = g.mysql(schema_dict, tbl_name, args.drop_table)
+    tbl_create, tbl_cols = g.mysql(
+        schema_dict, tbl_name, args.drop_table, args.defer_indexes
+    )
     # generally, there isn't a good reason to insert values manually into an auto-incrementing col
     auto_inc_cols = [x for x in tbl_cols.keys() if tbl_cols[x].get("auto_inc")]
     # if the user has hinted that a column is empty, it should only be created, not given inserts
@@ -83,5 +96,16 @@ if __name__ == "__main__":
         del tbl_cols[x]
     for x in empty_cols:
         del tbl_cols[x]
-    r = Runner(args, schema_dict, tbl_name, tbl_cols, tbl_create, unique_cols)
+    tbl_indexes = ""
+    if args.defer_indexes and "postgres" in args.filetype:
+        tbl_indexes = g.postgres_indexes(tbl_name, unique_cols)
+    elif args.defer_indexes:
+        tbl_indexes = g.mysql_indexes(tbl_name, unique_cols)
+    r = Runner(
+        args, schema_dict, tbl_name, tbl_cols, tbl_create, unique_cols, tbl_indexes
+    )
     r.run()
+    if args.profile:
+        r.report_profile()
+    if args.metrics:
+        r.write_metrics()
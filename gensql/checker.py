@@ -0,0 +1,164 @@
+from hashlib import blake2b
+from math import log
+import os
+import sqlite3
+import tempfile
+
+from utilities.constants import DEFAULT_INSERT_CHUNK_SIZE
+
+# more hashes barely lower the false positives when memory is plentiful, and
+# every one costs time; a false positive only costs a lookup on disk
+_MAX_HASHES = 6
+
+
+class BloomChecker:
+    """
+    A set of the unique values seen so far, for use in place of the set() that
+    check_unique is given, but with its memory use capped at max_memory bytes.
+
+    Every value is kept in an exact set in a temporary SQLite database on disk,
+    fronted by a Bloom filter that takes up the memory budget. Most values have
+    never been seen, which the filter answers without touching the disk; only
+    its (rare) positives are looked up in SQLite. Values are written to disk in
+    batches, so the filter plus one batch is all that's held in memory.
+    """
+
+    def __init__(
+        self,
+        max_memory: int,
+        expected: int,
+        directory: str | None = None,
+        path: str | None = None,
+    ):
+        # a power of two, so that positions can be masked out of the hash
+        self.num_bits = 1 << max(3, (max_memory * 8).bit_length() - 1)
+        self.mask = self.num_bits - 1
+        # the number of hashes that minimizes false positives for this many values
+        self.num_hashes = min(
+            _MAX_HASHES, max(1, round(self.num_bits / max(expected, 1) * log(2)))
+        )
+        self.bits = bytearray(self.num_bits // 8)
+        self._last = (None, None)
+        self.pending = set()
+        # each flush is numbered, so that a checkpoint can be rolled back to
+        self.batch = 0
+        # given a path, e.g. a checkpoint's, the values are kept there after close()
+        self.temporary = path is None
+        if self.temporary:
+            fd, self.path = tempfile.mkstemp(suffix=".db", dir=directory)
+            os.close(fd)
+        else:
+            self.path = path
+        self.conn = sqlite3.connect(self.path)
+        if self.temporary:
+            self.conn.execute("PRAGMA journal_mode = OFF")
+            self.conn.execute("PRAGMA synchronous = OFF")
+        else:
+            # a checkpoint points at a batch, so it has to survive a crash
+            self.conn.execute("PRAGMA journal_mode = WAL")
+            self.conn.execute("PRAGMA synchronous = FULL")
+        # a negative cache_size is in KiB
+        self.conn.execute("PRAGMA cache_size = -2048")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen (val TEXT PRIMARY KEY, batch INTEGER) "
+            "WITHOUT ROWID"
+        )
+
+    def _positions(self, val: str) -> list[int]:
+        # check_unique asks if a value is in here, then adds it, so reuse the hash
+        if self._last[0] == val:
+            return self._last[1]
+        # one 64-bit hash per position, all cut from a single digest
+        digest = blake2b(val.encode(), digest_size=8 * self.num_hashes).digest()
+        mask = self.mask
+        positions = [h & mask for h in memoryview(digest).cast("Q")]
+        self._last = (val, positions)
+        return positions
+
+    def __contains__(self, val) -> bool:
+        val = str(val)
+        bits = self.bits
+        for p in self._positions(val):
+            if not bits[p >> 3] & (1 << (p & 7)):
+                return False
+        if val in self.pending:
+            return True
+        query = "SELECT 1 FROM seen WHERE val = ?"
+        return self.conn.execute(query, (val,)).fetchone() is not None
+
+    def add(self, val):
+        val = str(val)
+        bits = self.bits
+        for p in self._positions(val):
+            bits[p >> 3] |= 1 << (p & 7)
+        self.pending.add(val)
+        if len(self.pending) >= DEFAULT_INSERT_CHUNK_SIZE:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        self.batch += 1
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO seen VALUES (?, ?)",
+            ((v, self.batch) for v in self.pending),
+        )
+        self.conn.commit()
+        self.pending.clear()
+
+    def save(self, path: str) -> int:
+        """
+        Writes the filter to path, e.g. for a checkpoint, and returns the last
+        batch of values written to disk. The values themselves aren't copied, so
+        they have to be kept in a path given to the checker.
+        """
+        self.flush()
+        with open(path, "wb") as f:
+            f.write(self.bits)
+            f.flush()
+            os.fsync(f.fileno())
+        return self.batch
+
+    def restore(self, path: str, batch: int):
+        """
+        Goes back to what was seen when save() wrote path and returned batch,
+        dropping any values added since. The filter has to be the same size as
+        the one that was saved.
+        """
+        with open(path, "rb") as f:
+            bits = f.read()
+        if len(bits) != len(self.bits):
+            raise ValueError(
+                f"{path} holds a filter of {len(bits)} bytes, not {len(self.bits)}"
+            )
+        self.bits[:] = bits
+        self.pending.clear()
+        self._last = (None, None)
+        self.conn.execute("DELETE FROM seen WHERE batch > ?", (batch,))
+        self.conn.commit()
+        self.batch = batch
+
+    def close(self):
+        self.conn.close()
+        if self.temporary:
+            os.unlink(self.path)
+
+
+class LoggedSet(set):
+    """
+    A set that also lists the values added to it since the last take_added(),
+    so that a checkpoint only has to save those.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.added = []
+
+    def add(self, val):
+        if val not in self:
+            super().add(val)
+            self.added.append(val)
+
+    def take_added(self) -> list:
+        added, self.added = self.added, []
+        return added
@@ -0,0 +1,157 @@
+import json
+import os
+from pathlib import Path
+import pickle
+
+from exceptions.exceptions import CheckpointError
+from gensql.checker import BloomChecker, LoggedSet
+
+# options that change neither the rows that are made, nor where they're written
+_IGNORED_ARGS = {
+    "checkpoint_dir",
+    "checkpoint_every",
+    "debug",
+    "force",
+    "quiet",
+    "resume",
+    "seed",
+    "unique_dir",
+}
+
+
+class Checkpoint:
+    """
+    The state of a run as of its last complete chunk, kept in a directory so that
+    the run can be resumed: the next row to make, the size of the output up to
+    it, any INSERT left open by --max-packet, and the unique values seen so far.
+    Everything else a chunk needs is derived from the run's seeds and the row it
+    starts at, so isn't saved.
+
+    Each unique column has its own seen values, and only those added since the
+    last checkpoint are saved: the sets' are appended to seen.log together, and
+    a BloomChecker keeps its values in seen.<column>.db as they're added, so
+    just its filter is copied, to a new file each time. Each
+    checkpoint records how far into them it goes, and state.json is replaced
+    last, so a checkpoint is never left half written.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self.state_path = self.directory / "state.json"
+        self.seen_log = self.directory / "seen.log"
+        self.generation = 0
+
+    @staticmethod
+    def _args(args) -> dict:
+        return {k: v for k, v in sorted(vars(args).items()) if k not in _IGNORED_ARGS}
+
+    def load(self, args) -> dict:
+        """
+        Reads the last checkpoint, and checks that it was made with the same
+        options as this run.
+        """
+        try:
+            with open(self.state_path, "r") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            raise CheckpointError(self.directory, "no checkpoint was found") from None
+        changed = [k for k, v in self._args(args).items() if state["args"].get(k) != v]
+        if changed:
+            raise CheckpointError(
+                self.directory,
+                f"options differ from the interrupted run: {', '.join(changed)}",
+            ) from None
+        self.generation = state["generation"]
+        return state
+
+    def seen_db(self, col: str) -> str:
+        """
+        Returns where the BloomChecker for a column should keep its values, so
+        that they're on disk as they're added, rather than copied at every
+        checkpoint.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        return str(self.directory / f"seen.{col}.db")
+
+    def save(
+        self,
+        args,
+        seeds: dict[str, int],
+        next_row: int,
+        offset: int,
+        packet_size: int,
+        seen_rows: dict[str, LoggedSet | BloomChecker],
+    ):
+        """
+        Saves a checkpoint. The output has to be flushed up to offset already.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.generation += 1
+        if any(isinstance(s, BloomChecker) for s in seen_rows.values()):
+            bits = {c: f"seen_{self.generation}.{c}" for c in seen_rows}
+            seen = {
+                "bits": bits,
+                "batch": {
+                    c: s.save(self.directory / bits[c]) for c, s in seen_rows.items()
+                },
+            }
+        else:
+            with open(self.seen_log, "ab") as f:
+                added = {c: s.take_added() for c, s in seen_rows.items()}
+                pickle.dump(added, f, pickle.HIGHEST_PROTOCOL)
+                f.flush()
+                os.fsync(f.fileno())
+                seen = {"log_size": f.tell()}
+        state = {
+            "generation": self.generation,
+            "args": self._args(args),
+            "seeds": seeds,
+            "next_row": next_row,
+            "offset": offset,
+            "packet_size": packet_size,
+            "seen": seen,
+        }
+        tmp = self.state_path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.state_path)
+        current = seen.get("bits", {}).values()
+        for path in self.directory.glob("seen_*"):
+            if path.name not in current:
+                path.unlink()
+
+    def restore_seen(
+        self, state: dict, seen_rows: dict[str, LoggedSet | BloomChecker]
+    ) -> dict[str, LoggedSet | BloomChecker]:
+        """
+        Restores the unique values seen up to the checkpoint into seen_rows, and
+        returns it.
+        """
+        seen = state["seen"]
+        if "bits" in seen:
+            for c, s in seen_rows.items():
+                s.restore(self.directory / seen["bits"][c], seen["batch"][c])
+            return seen_rows
+        with open(self.seen_log, "r+b") as f:
+            while f.tell() < seen["log_size"]:
+                for c, added in pickle.load(f).items():
+                    seen_rows[c].update(added)
+            # anything past it was saved by a checkpoint that never completed
+            f.truncate(seen["log_size"])
+        return seen_rows
+
+    def clear(self):
+        """
+        Removes the checkpoint, once the run it belongs to has finished.
+        """
+        self.state_path.unlink(missing_ok=True)
+        # i.e. seen.log, each column's seen.<column>.db and its WAL, and the filters
+        for path in self.directory.glob("seen*"):
+            path.unlink()
+        try:
+            self.directory.rmdir()
+        except OSError:
+            # not empty, or never made
+            pass
@@ -0,0 +1,133 @@
+from math import exp
+import random
+import re
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# the parameters of each distribution, and their defaults
+_DEFAULTS = {
+    "uniform": (),
+    # the exponent
+    "zipf": (1.0,),
+    # the standard deviation, as a percentage of the values
+    "normal": (15.0,),
+    # the percentage of values that are hot, and the percentage of rows they get
+    "hotset": (20.0, 80.0),
+}
+# the column options that make a column draw its values through an AliasSampler
+SKEW_OPTIONS = {"distribution", "distinct"}
+# an alias table costs two list slots per value, so this is ~160 MiB
+MAX_SKEWED_VALUES = 10_000_000
+
+
+def parse_distribution(spec: str) -> tuple[str, tuple[float, ...]]:
+    """
+    Parses a distribution option, e.g. zipf, zipf(1.2), or hotset(10, 90), into
+    its name and parameters, filling in any that are left out. Raises ValueError
+    if it's not valid.
+    """
+    match = re.fullmatch(r"\s*(\w+)\s*(?:\((.*)\))?\s*", spec)
+    if not match or match[1] not in _DEFAULTS:
+        raise ValueError(
+            f"distribution must be one of {', '.join(_DEFAULTS)} (got {spec})"
+        )
+    kind, defaults = match[1], _DEFAULTS[match[1]]
+    try:
+        params = tuple(float(p) for p in match[2].split(",")) if match[2] else ()
+    except ValueError:
+        raise ValueError(f"{kind} parameters must be numbers (got {spec})") from None
+    if len(params) > len(defaults):
+        raise ValueError(f"{kind} takes at most {len(defaults)} parameter(s)")
+    params += defaults[len(params) :]
+    if kind == "zipf" and not params[0] > 0:
+        raise ValueError(f"zipf exponent must be greater than 0 (got {spec})")
+    if kind == "normal" and not params[0] > 0:
+        raise ValueError(
+            f"normal standard deviation must be greater than 0 (got {spec})"
+        )
+    if kind == "hotset" and not all(0 < p < 100 for p in params):
+        raise ValueError(f"hotset percentages must be between 0 and 100 (got {spec})")
+    return kind, params
+
+
+def _weights(kind: str, params: tuple[float, ...], n: int) -> list[float]:
+    if kind == "zipf":
+        return [1 / rank ** params[0] for rank in range(1, n + 1)]
+    if kind == "normal":
+        center, sd = (n - 1) / 2, params[0] / 100 * n
+        return [exp(-0.5 * ((i - center) / sd) ** 2) for i in range(n)]
+    # hotset
+    hot = max(1, min(n - 1, round(n * params[0] / 100)))
+    share = params[1] / 100
+    return [share / hot] * hot + [(1 - share) / (n - hot)] * (n - hot)
+
+
+class AliasSampler:
+    """
+    Draws indices into n values from a distribution in O(1) per draw, with
+    Vose's alias method: each index has a probability of being kept, and
+    otherwise is swapped for its alias. The whole part of a single uniform draw
+    scaled by n picks the index, and the fractional part decides whether to keep
+    it, so a skewed draw costs the same one random number as a uniform one.
+    """
+
+    def __init__(self, n: int, weights: list[float] | None = None):
+        self.n = n
+        self.prob = None
+        if weights is None:
+            return
+        total = sum(weights)
+        prob = [w * n / total for w in weights]
+        alias = list(range(n))
+        small = [i for i, p in enumerate(prob) if p < 1]
+        large = [i for i, p in enumerate(prob) if p >= 1]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            alias[s] = l
+            prob[l] += prob[s] - 1
+            (small if prob[l] < 1 else large).append(l)
+        # anything left is only off 1 by rounding
+        for i in small + large:
+            prob[i] = 1.0
+        self.prob, self.alias = prob, alias
+        if np is not None:
+            self._prob = np.array(prob)
+            self._alias = np.array(alias)
+
+    @classmethod
+    def from_distribution(cls, spec: str, n: int) -> "AliasSampler":
+        kind, params = parse_distribution(spec)
+        if kind == "uniform" or n == 1:
+            return cls(n)
+        if n > MAX_SKEWED_VALUES:
+            raise ValueError(
+                f"a {kind} distribution over {n} values would take too much memory - "
+                f"set distinct to at most {MAX_SKEWED_VALUES}"
+            )
+        return cls(n, _weights(kind, params, n))
+
+    def sample(self, k: int, rng=None) -> list[int]:
+        """
+        Returns k indices, drawn with a NumPy Generator if one's given, otherwise
+        with the random module.
+        """
+        n = self.n
+        if rng is not None:
+            if self.prob is None:
+                return rng.integers(0, n, k).tolist()
+            u = rng.random(k) * n
+            idx = u.astype(np.int64)
+            return np.where(u - idx < self._prob[idx], idx, self._alias[idx]).tolist()
+        rand = random.random
+        if self.prob is None:
+            return [int(rand() * n) for _ in range(k)]
+        prob, alias = self.prob, self.alias
+        out = []
+        for _ in range(k):
+            u = rand() * n
+            i = int(u)
+            out.append(i if u - i < prob[i] else alias[i])
+        return out
@@ -1,9 +1,8 @@
 from collections import defaultdict
-from datetime import datetime, timedelta
-from math import floor
-import random
+from datetime import datetime
 
 from utilities import logger, utilities
+from utilities.constants import DATES_START
 
 
 class Generator:
@@ -11,32 +10,15 @@ class Generator:
         self.args = args
         self.end_date = datetime.now()
         self.logger = logger.Logger().logger
-        self.start_date = datetime(1995, 5, 23)
+        self.start_date = DATES_START
         self.utils = utilities.Utilities()
 
-    def make_dates(self, num: int) -> list:
-        """
-        Makes n datetimes in a given range.
-        strftime is actually extremely slow; this is faster.
-        """
-        dates = []
-        delta = self.end_date - self.start_date
-        delta_int = delta.days * 86400 + delta.seconds
-        for _ in range(num):
-            rand_int = floor(random.random() * delta_int)
-            new_date = self.start_date + timedelta(seconds=rand_int)
-            yr = f"{new_date.year:04d}"
-            mo = f"{new_date.month:02d}"
-            da = f"{new_date.day:02d}"
-            hr = f"{new_date.hour:02d}"
-            mi = f"{new_date.minute:02d}"
-            se = f"{new_date.second:02d}"
-            new_datestr = f"'{yr}-{mo}-{da} {hr}:{mi}:{se}'"
-            dates.append(new_datestr)
-        return dates
-
     def mysql(
-        self, schema: dict[str, dict[str, str]], tbl_name: str, drop_table: bool = False
+        self,
+        schema: dict[str, dict[str, str]],
+        tbl_name: str,
+        drop_table: bool = False,
+        defer_indexes: bool = False,
     ) -> tuple[str, dict[str, str]]:
         auto_inc_exists = False
         msg = ""
@@ -55,10 +37,16 @@ class Generator:
                 match k:
                     case "type":
                         cols[col]["type"] = v
+                    case "after":
+                        cols[col]["after"] = v
                     case "auto_increment":
                         cols[col]["auto_inc"] = self.utils.strtobool(v)
                     case "default":
                         cols[col]["default"] = v
+                    case "distinct":
+                        cols[col]["distinct"] = v
+                    case "distribution":
+                        cols[col]["distribution"] = v
                     case "invisible":
                         cols[col]["invisible"] = self.utils.strtobool(v)
                     case "width":
@@ -73,6 +61,8 @@ class Generator:
                         cols[col]["max_length"] = v
                     case "nullable":
                         cols[col]["nullable"] = self.utils.strtobool(v)
+                    case "order":
+                        cols[col]["order"] = v
                     case "primary_key":
                         cols[col]["pk"] = True
                         pk = col
@@ -81,6 +71,8 @@ class Generator:
                         uniques.append(col)
                     case "uuid_v4":
                         cols[col]["uuid_v4"] = self.utils.strtobool(v)
+                    case "uuid_version":
+                        cols[col]["uuid_version"] = v
                     case _:
                         raise ValueError(f"column attribute {k} is invalid")
             if cols[col]["width"]:
@@ -126,6 +118,9 @@ class Generator:
                 col
             ] = f"  `{col}` {cols[col]['type']}{' ' + ' '.join(col_opts) if col_opts else ''},"
         msg += "\n".join(col_defs.values())
+        # they're added by mysql_indexes() after the load instead
+        if defer_indexes:
+            uniques = []
         if pk:
             msg += f"\n  PRIMARY KEY (`{pk}`){',' if uniques else ''}\n"
         else:
@@ -141,3 +136,23 @@ class Generator:
             msg = msg[::-1].replace(",", "", 1)[::-1]
         msg += f") ENGINE=InnoDB {'AUTO_INCREMENT=0' if auto_inc_exists else ''} DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;\n"
         return (msg, cols)
+
+    def mysql_indexes(self, tbl_name: str, uniques: list[str]) -> str:
+        """
+        Makes the statement that adds the unique keys left out of the table by
+        --defer-indexes. It's a single ALTER TABLE, so that InnoDB reads the rows
+        once for all of them, and builds each index bottom-up from sorted keys.
+        """
+        if not uniques:
+            return ""
+        keys = ",\n".join(f"  ADD UNIQUE KEY {u} (`{u}`)" for u in uniques)
+        return f"ALTER TABLE `{tbl_name}`\n{keys};\n"
+
+    def postgres_indexes(self, tbl_name: str, uniques: list[str]) -> str:
+        """
+        The same as mysql_indexes(), for Postgres.
+        """
+        if not uniques:
+            return ""
+        keys = ",\n".join(f'  ADD UNIQUE ("{u}")' for u in uniques)
+        return f'ALTER TABLE "{tbl_name}"\n{keys};\n'
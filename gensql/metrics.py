@@ -0,0 +1,202 @@
+import hashlib
+import json
+import os
+import platform
+import resource
+import socket
+import sys
+import time
+from urllib.parse import urlsplit
+
+from gensql.profiler import Profiler
+
+try:
+    import tomllib
+except ImportError:
+    tomllib = None
+
+# the phases are made up of these profiler stages; allocate and check unique are
+# left out, as they're already counted in the stages that call them
+_PHASES = {
+    "load references": "reference_load",
+    "set up allocators": "allocator_setup",
+    "draw dates": "generation",
+    "generate": "generation",
+    "format": "formatting",
+    "finish rows": "formatting",
+    "encode": "formatting",
+    "write": "write",
+}
+
+
+def _version() -> str | None:
+    if tomllib is None:
+        return None
+    try:
+        with open("pyproject.toml", "rb") as f:
+            return tomllib.load(f)["tool"]["poetry"]["version"]
+    except (FileNotFoundError, KeyError):
+        return None
+
+
+def _peak_rss(who: int) -> int:
+    # ru_maxrss is in KiB on Linux, but in bytes on macOS
+    return resource.getrusage(who).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(1024**2):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _label(val) -> str:
+    return str(val).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Metrics:
+    """
+    A machine-readable record of a run for --metrics, e.g. for a batch scheduler
+    to track throughput across versions and hosts: the phase timings from the
+    run's profiler, peak RSS, throughput, and every file written, with its size
+    and SHA-256. Checksums that weren't already taken while writing (e.g. for
+    split parts) are taken by reading the files back.
+    """
+
+    def __init__(
+        self, args, tbl_name: str, profiler: Profiler, outputs: dict[str, str | None]
+    ):
+        self.args = args
+        self.tbl_name = tbl_name
+        self.profiler = profiler
+        self.outputs = outputs
+        self._metrics = None
+
+    def _args(self) -> dict:
+        resolved = dict(vars(self.args))
+        # a --sink URL can hold a password
+        if resolved.get("sink"):
+            url = urlsplit(resolved["sink"])
+            if url.password:
+                netloc = url.netloc.replace(f":{url.password}@", ":***@", 1)
+                resolved["sink"] = url._replace(netloc=netloc).geturl()
+        return resolved
+
+    def collect(self) -> dict:
+        if self._metrics is not None:
+            return self._metrics
+        finished = time.time()
+        elapsed = time.perf_counter() - self.profiler.start
+        stats = self.profiler.stats
+        phases = dict.fromkeys(
+            ["reference_load", "allocator_setup", "generation", "formatting", "write"],
+            0.0,
+        )
+        for name, (seconds, _, _) in stats.items():
+            phase = _PHASES.get(name) or _PHASES.get(name.split(" ", 1)[0])
+            if phase:
+                phases[phase] += seconds
+        rows = stats["finish rows"][1] if "finish rows" in stats else 0
+        self._metrics = {
+            "table": self.tbl_name,
+            "version": _version(),
+            "host": socket.gethostname(),
+            "python": platform.python_version(),
+            "started": finished - elapsed,
+            "finished": finished,
+            "seconds": elapsed,
+            "rows": rows,
+            "rows_per_second": rows / elapsed,
+            # uncompressed, as formatted
+            "output_bytes": stats["write"][1] if "write" in stats else 0,
+            "peak_rss_bytes": _peak_rss(resource.RUSAGE_SELF),
+            # the largest of any --workers
+            "peak_worker_rss_bytes": _peak_rss(resource.RUSAGE_CHILDREN),
+            # with --workers, generation and formatting are summed over the workers
+            "phase_seconds": phases,
+            "files": [
+                {
+                    "path": path,
+                    "bytes": os.path.getsize(path),
+                    "sha256": sha256 or _sha256(path),
+                }
+                for path, sha256 in self.outputs.items()
+            ],
+            "args": self._args(),
+        }
+        return self._metrics
+
+    def to_json(self) -> str:
+        return json.dumps(self.collect(), indent=4) + "\n"
+
+    def to_prometheus(self) -> str:
+        m = self.collect()
+        table = f'table="{_label(self.tbl_name)}"'
+        lines = []
+
+        def metric(name: str, help: str, samples: list[tuple[str, float]]):
+            lines.append(f"# HELP gensql_{name} {help}")
+            lines.append(f"# TYPE gensql_{name} gauge")
+            for labels, val in samples:
+                lines.append(f"gensql_{name}{{{table}{labels}}} {val}")
+
+        info = {k: m[k] for k in ("version", "host", "python")}
+        info["args"] = json.dumps(m["args"], sort_keys=True)
+        metric(
+            "run_info",
+            "Where the last run happened, and with which arguments.",
+            [("".join(f',{k}="{_label(v)}"' for k, v in info.items()), 1)],
+        )
+        metric(
+            "last_run_timestamp_seconds",
+            "When the last run finished.",
+            [("", m["finished"])],
+        )
+        metric("duration_seconds", "Wall time of the last run.", [("", m["seconds"])])
+        metric("rows", "Rows made by the last run.", [("", m["rows"])])
+        metric(
+            "rows_per_second",
+            "Throughput of the last run.",
+            [("", m["rows_per_second"])],
+        )
+        metric(
+            "output_bytes",
+            "Bytes of rows written by the last run, before any compression.",
+            [("", m["output_bytes"])],
+        )
+        metric(
+            "peak_rss_bytes",
+            "Peak resident set size of the last run's processes.",
+            [
+                (',process="main"', m["peak_rss_bytes"]),
+                (',process="worker"', m["peak_worker_rss_bytes"]),
+            ],
+        )
+        metric(
+            "phase_seconds",
+            "Time spent in each phase of the last run.",
+            [(f',phase="{k}"', v) for k, v in m["phase_seconds"].items()],
+        )
+        metric(
+            "file_bytes",
+            "Size of each file written by the last run, labeled with its SHA-256.",
+            [
+                (f',path="{_label(f["path"])}",sha256="{f["sha256"]}"', f["bytes"])
+                for f in m["files"]
+            ],
+        )
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str):
+        """
+        Writes the metrics to path, as a Prometheus textfile if it ends in .prom,
+        otherwise as JSON. The file is replaced atomically, as collectors may be
+        reading it at any time.
+        """
+        data = self.to_prometheus() if path.endswith(".prom") else self.to_json()
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            f.write(data)
+        os.replace(tmp, path)
@@ -0,0 +1,203 @@
+from collections.abc import Sequence
+import mmap
+import os
+import sqlite3
+import struct
+
+from utilities.constants import REFERENCE_PACK
+
+# magic, version, and number of sections
+_HEADER = struct.Struct("<8sII")
+# name, number of items, and where its offsets and data start
+_ENTRY = struct.Struct("<24sQQQ")
+_MAGIC = b"GENSQLPK"
+_VERSION = 1
+
+# the text files that are packed as-is, one item per line
+_TEXT_SOURCES = {
+    "first_names": "content/first_names.txt",
+    "last_names": "content/last_names.txt",
+    "wordlist": "content/wordlist.txt",
+    "lorem_ipsum": "content/lorem_ipsum.txt",
+}
+_DB_SOURCE = "db/gensql.db"
+
+
+class PackedList(Sequence):
+    """
+    A read-only list of strings in a ReferencePack. Items are decoded from the
+    mapped file when they're looked up, or raw() returns them without a copy.
+    The items are stored joined by newlines, so tolist() decodes every one of
+    them with a single decode and split, and take() looks up a whole batch.
+    """
+
+    def __init__(self, offsets: memoryview, data: memoryview):
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def raw(self, idx: int) -> memoryview:
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError("PackedList index out of range")
+        # each item is followed by its newline
+        return self.data[self.offsets[idx] : self.offsets[idx + 1] - 1]
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        return str(self.raw(idx), "utf-8")
+
+    def take(self, indices: list[int]) -> list[str]:
+        """
+        Looks up a batch of items by index, which must be in range. A batch big
+        enough that most of the items will be in it is decoded in one pass, as
+        with tolist(), and the decoded list is dropped again once it's indexed;
+        a smaller one decodes each of its items from its own slice.
+        """
+        # a single pass costs about a sixth of a lookup per item
+        if len(indices) * 6 >= len(self):
+            items = self.tolist()
+            return [items[i] for i in indices]
+        offsets, data = self.offsets, self.data
+        return [str(data[offsets[i] : offsets[i + 1] - 1], "utf-8") for i in indices]
+
+    def tolist(self) -> list[str]:
+        if not len(self):
+            return []
+        return str(self.data, "utf-8")[:-1].split("\n")
+
+
+class ReferencePack:
+    """
+    All of the reference data - names, words, lorem ipsum, cities, and countries -
+    compiled by --build-pack into a single file of offset-indexed sections, which
+    is memory-mapped when loaded. Loading only parses the section index, and as
+    the mapping is shared, so are its pages, between every process using it.
+
+    The pack records the size and modification time of the files it was built
+    from, and load() ignores it if any of them has since changed.
+    """
+
+    def __init__(self, path: str = REFERENCE_PACK):
+        self.path = path
+        with open(path, "rb") as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self.mmap)
+        magic, version, num_sections = _HEADER.unpack_from(view)
+        if magic != _MAGIC or version != _VERSION:
+            view.release()
+            self.mmap.close()
+            raise ValueError(f"{path} is not a version {_VERSION} reference pack")
+        self.sections = {}
+        for i in range(num_sections):
+            name, num, offsets_pos, data_pos = _ENTRY.unpack_from(
+                view, _HEADER.size + i * _ENTRY.size
+            )
+            offsets = view[offsets_pos : offsets_pos + (num + 1) * 8].cast("Q")
+            data = view[data_pos : data_pos + offsets[num]]
+            self.sections[name.rstrip(b"\0").decode()] = PackedList(offsets, data)
+        self._view = view
+
+    def __getitem__(self, name: str) -> PackedList:
+        return self.sections[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.sections
+
+    def close(self):
+        for section in self.sections.values():
+            section.offsets.release()
+            section.data.release()
+        self.sections = {}
+        self._view.release()
+        self.mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def is_stale(self) -> bool:
+        for source in self["sources"]:
+            path, size, mtime_ns = source.rsplit("\t", 2)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                return True
+            if st.st_size != int(size) or st.st_mtime_ns != int(mtime_ns):
+                return True
+        return False
+
+    @classmethod
+    def load(cls, path: str = REFERENCE_PACK) -> "ReferencePack | None":
+        """
+        Returns the pack at path, or None if there isn't one, or it's stale, so
+        that the caller can fall back to the source files.
+        """
+        try:
+            pack = cls(path)
+        except (FileNotFoundError, ValueError):
+            return None
+        if pack.is_stale():
+            pack.close()
+            return None
+        return pack
+
+    @staticmethod
+    def write(path: str, sections: dict[str, list[str]], sources: list[str]):
+        """
+        Writes sections to a pack at path, recording the files they came from.
+        Items can't contain newlines.
+        """
+        sections = dict(sections)
+        sections["sources"] = [
+            f"{src}\t{os.stat(src).st_size}\t{os.stat(src).st_mtime_ns}"
+            for src in sources
+        ]
+        index = []
+        body = bytearray()
+        pos = _HEADER.size + len(sections) * _ENTRY.size
+        for name, items in sections.items():
+            data = "".join(f"{item}\n" for item in items).encode()
+            offsets = [0]
+            for item in items:
+                offsets.append(offsets[-1] + len(item.encode()) + 1)
+            # keep the offsets 8-byte aligned, so they can be cast in place
+            body += bytes(-(pos + len(body)) % 8)
+            index.append((name.encode(), len(items), pos + len(body)))
+            body += struct.pack(f"<{len(offsets)}Q", *offsets)
+            index[-1] += (pos + len(body),)
+            body += data
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, len(sections)))
+            for entry in index:
+                f.write(_ENTRY.pack(*entry))
+            f.write(body)
+        os.replace(tmp, path)
+
+    @classmethod
+    def build(cls, path: str = REFERENCE_PACK) -> str:
+        """
+        Packs the reference data in content/ and db/gensql.db into path.
+        """
+        sections = {}
+        for name, src in _TEXT_SOURCES.items():
+            with open(src, "r") as f:
+                sections[name] = f.read().splitlines()
+        conn = sqlite3.connect(_DB_SOURCE)
+        try:
+            cities = conn.execute("SELECT city, country FROM cities").fetchall()
+            countries = conn.execute("SELECT code, country FROM countries").fetchall()
+        finally:
+            conn.close()
+        sections["cities"], sections["city_countries"] = map(list, zip(*cities))
+        sections["country_codes"], sections["countries"] = map(list, zip(*countries))
+        cls.write(path, sections, [*_TEXT_SOURCES.values(), _DB_SOURCE])
+        return path
@@ -0,0 +1,142 @@
+from collections import defaultdict
+from contextlib import contextmanager
+import sys
+from time import perf_counter
+
+
+class Profiler:
+    """
+    Cumulative timings for --profile. Callables are wrapped with wrap(), which
+    adds the time spent in them and the number of values (or rows, or bytes)
+    they handled to a named stage. Timing is per call, and calls are per chunk
+    or column, so the overhead is negligible next to the work being timed.
+    """
+
+    def __init__(self):
+        self.start = perf_counter()
+        # name -> [seconds, count, unit]
+        self.stats = defaultdict(lambda: [0.0, 0, "values"])
+
+    def wrap(self, name: str, fn, unit: str = "values", count=None):
+        """
+        Returns fn, timed as the stage name. count is called with fn's arguments
+        to tell how many units it handled; by default, the length of its result.
+        """
+        stat = self.stats[name]
+        stat[2] = unit
+
+        def timed(*args, **kwargs):
+            start = perf_counter()
+            result = fn(*args, **kwargs)
+            stat[0] += perf_counter() - start
+            stat[1] += count(*args) if count else len(result)
+            return result
+
+        return timed
+
+    @contextmanager
+    def time(self, name: str, count: int = 1, unit: str = "runs"):
+        """
+        Times the body of a with statement as the stage name, e.g. for one-offs.
+        """
+        stat = self.stats[name]
+        stat[2] = unit
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            stat[0] += perf_counter() - start
+            stat[1] += count
+
+    def wrap_file(self, f):
+        """
+        Returns f, with its writes timed as the stage write.
+        """
+        return _TimedFile(f, self.stats["write"])
+
+    def pop(self) -> dict:
+        """
+        Returns the stats so far, and zeroes them, e.g. to send a worker's
+        stats back with each chunk it makes.
+        """
+        stats = {}
+        for name, stat in self.stats.items():
+            if stat[1]:
+                stats[name] = list(stat)
+                stat[0], stat[1] = 0.0, 0
+        return stats
+
+    def merge(self, stats: dict):
+        for name, (seconds, count, unit) in stats.items():
+            stat = self.stats[name]
+            stat[0] += seconds
+            stat[1] += count
+            stat[2] = unit
+
+    def report(self, num_rows: int, file=sys.stderr):
+        """
+        Prints the stages ranked by the time spent in them, with their rates.
+        """
+        elapsed = perf_counter() - self.start
+        written = self.stats["write"][1] if "write" in self.stats else 0
+        print(
+            f"profile: {num_rows:,} rows in {elapsed:.2f}s, "
+            f"{num_rows / elapsed:,.0f} rows/s, "
+            f"{written / elapsed / 1024**2:,.1f} MiB/s written",
+            file=file,
+        )
+        stats = sorted(
+            ((s, n, c, u) for n, (s, c, u) in self.stats.items() if c),
+            reverse=True,
+        )
+        width = max([len(name) for _, name, _, _ in stats] + [5])
+        print(
+            f"{'stage':<{width}}  {'seconds':>9}  {'% wall':>6}  {'count':>14}  rate",
+            file=file,
+        )
+        for seconds, name, count, unit in stats:
+            rate = f"{count / seconds:,.0f} {unit}/s" if seconds else "-"
+            print(
+                f"{name:<{width}}  {seconds:>9.3f}  {seconds / elapsed:>6.1%}  "
+                f"{count:>14,}  {rate}",
+                file=file,
+            )
+        print(
+            "allocate and check times are also counted in the generate and finish "
+            "times they're part of; with --workers, the generate, allocate, and "
+            "format times are summed over the workers",
+            file=file,
+        )
+
+
+class _TimedFile:
+    """
+    Wraps a file (or writer) to time its writes, passing anything else through.
+    """
+
+    def __init__(self, f, stat: list):
+        self._f = f
+        self._stat = stat
+        stat[2] = "bytes"
+
+    @staticmethod
+    def _size(data: str | bytes) -> int:
+        if isinstance(data, str) and not data.isascii():
+            return len(data.encode())
+        return len(data)
+
+    def write(self, data: str | bytes):
+        start = perf_counter()
+        result = self._f.write(data)
+        self._stat[0] += perf_counter() - start
+        self._stat[1] += self._size(data)
+        return result
+
+    def writelines(self, lines: list[str] | list[bytes]):
+        start = perf_counter()
+        self._f.writelines(lines)
+        self._stat[0] += perf_counter() - start
+        self._stat[1] += sum(map(self._size, lines))
+
+    def __getattr__(self, name: str):
+        return getattr(self._f, name)
@@ -1,119 +1,312 @@
-from copy import copy
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
 import json
 from math import ceil, floor
+from multiprocessing import Pool
+import os
 from os import urandom
 import random
 from pathlib import Path, PurePath
+import shlex
 import sqlite3
+import stat
+import struct
+import sys
+from uuid import UUID
 
 from exceptions.exceptions import (
     BinaryTypeInCSVError,
+    CheckpointError,
+    DuplicateValueError,
     OutputFilePermissionError,
     OverwriteFileError,
     TooManyRowsError,
+    UnsupportedCopyTypeError,
     UnsupportedRDBMSError,
 )
-from gensql.generator import Generator
+from gensql.checker import BloomChecker, LoggedSet
+from gensql.checkpoint import Checkpoint
+from gensql.distributions import SKEW_OPTIONS, AliasSampler
+from gensql.metrics import Metrics
+from gensql.pack import PackedList, ReferencePack
+from gensql.profiler import Profiler
+from gensql.sink import make_sink
+from gensql.sorter import ExternalSorter
+from gensql.timestamps import Timestamps
+from gensql.writer import SUFFIXES, CompressedWriter, HashingWriter
 from utilities.constants import (
+    DATES_CACHE,
+    DATES_START,
     DEFAULT_INSERT_CHUNK_SIZE,
     DEFAULT_MAX_FIELD_PCT,
     JSON_DEFAULT_KEYS,
     JSON_OBJ_MAX_KEYS,
     JSON_OBJ_MAX_VALS,
     MYSQL_INT_MIN_MAX,
+    MYSQL_SESSION_SETUP,
+    MYSQL_SESSION_TEARDOWN,
+    PG_EPOCH_SECONDS,
+    PGCOPY_HEADER,
+    PGCOPY_INT_FORMATS,
+    PGCOPY_TRAILER,
     PHONE_NUMBERS,
+    POSTGRES_SESSION_SETUP,
 )
 from utilities import logger, utilities
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def _take(pool: list | PackedList, indices: list[int]) -> list:
+    if isinstance(pool, PackedList):
+        return pool.take(indices)
+    return [pool[i] for i in indices]
+
+
+def _literal(vals: list) -> list[str]:
+    return [str(v) for v in vals]
+
+
+def _quote(vals: list) -> list[str]:
+    return [f"""'{v.replace("'", "''")}'""" for v in vals]
+
+
+def _uuid_to_bin(vals: list) -> list[str]:
+    hexes = [v.hex() for v in vals]
+    return [
+        f"UUID_TO_BIN('{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}')"
+        for h in hexes
+    ]
+
+
+# backslash, and the characters COPY's text format uses as delimiters
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+_COPY_NULL = "\\N"
+_PGCOPY_NULL = struct.pack(">i", -1)
+
+
+# set by _init_worker in each worker process of the pool
+_worker_runner = None
+
+
+def _init_worker(args, schema, tbl_name, tbl_cols, tbl_create, unique_cols, seeds):
+    global _worker_runner
+    random.seed(urandom(4))
+    _worker_runner = Runner(
+        args,
+        schema,
+        tbl_name,
+        tbl_cols,
+        tbl_create,
+        unique_cols,
+        seeds=seeds,
+        worker=True,
+    )
+
+
+def _make_rows_worker(
+    task: tuple[int, int, bool, bool],
+) -> tuple[list[str], list[list], dict | None]:
+    start, stop, has_timestamp, raw = task
+    _worker_runner.seek(start, stop)
+    columns = _worker_runner.make_rows(start, stop, has_timestamp, raw)
+    profiler = _worker_runner.profiler
+    # the parent doesn't compile a plan, so it's told which columns it's getting
+    return _worker_runner.plan_cols, columns, profiler.pop() if profiler else None
+
 
 class Runner:
-    def __init__(self, args, schema, tbl_name, tbl_cols, tbl_create, unique_cols):
-        self.allocator = utilities.Allocator
+    def __init__(
+        self,
+        args,
+        schema,
+        tbl_name,
+        tbl_cols,
+        tbl_create,
+        unique_cols,
+        tbl_indexes: str = "",
+        seeds: dict[str, int] | None = None,
+        worker: bool = False,
+    ):
         self.args = args
-        self.city_country_swapped = False
+        self.allocator = utilities.Allocator
+        # the C allocator is limited to uint32, and holds every ID in memory
+        if (
+            self.args.allocator == "permutation"
+            or self.args.num > MYSQL_INT_MIN_MAX["MYSQL_MAX_INT_UNSIGNED"]
+        ):
+            self.allocator = utilities.PermutationAllocator
         self.logger = logger.Logger().logger
+        # --metrics takes its phase times from the profiler
+        self.profiler = None
+        if self.args.profile or self.args.metrics:
+            self.profiler = Profiler()
+        self.output_dir = self.args.output_dir
+        # every file written, and its SHA-256 if it's known without reading it back
+        self.outputs = {}
         self.schema = schema
+        self.checkpoint = None
+        self.resume_state = None
+        # the primary key, and how to compare its values, if --sort-by-pk sorts on it
+        self.sort_col = None
+        self.sort_key = None
+        if self.args.checkpoint_dir and not worker:
+            self.checkpoint = Checkpoint(self.args.checkpoint_dir)
+            if self.args.resume:
+                self.resume_state = self.checkpoint.load(self.args)
+        # every worker needs the same shuffle of the unique ID space to be able
+        # to take disjoint slices of it, so the seeds are decided once up front
+        if seeds is None and self.resume_state:
+            seeds = self.resume_state["seeds"]
+        self.seeds = seeds or self.make_seeds(self.args.seed)
         self.tbl_cols = tbl_cols
         self.tbl_create = tbl_create
+        # with --defer-indexes, the unique keys to add once the rows are loaded
+        self.tbl_indexes = tbl_indexes
         self.tbl_name = tbl_name
         self.utils = utilities.Utilities()
         self.unique_cols = unique_cols
+        # with --construct-uniques, these can't collide, so they're never checked
+        self.constructed_uniques = set()
+        if self.args.construct_uniques:
+            self.constructed_uniques = {
+                col
+                for col in unique_cols
+                if col == "email" or "int" in self.schema[col]["type"]
+            }
         self.uuid_allocator = utilities.UUIDAllocator
+        self.worker = worker
+        if np is not None:
+            self.rng = np.random.default_rng(self.seeds["master"])
         self._has_float = False
         self._has_monotonic = False
         self._has_unique = False
+        # bytes in the currently open INSERT with --max-packet, if any
+        self._packet_size = 0
+        self._packet_warned = False
+        # each has its own allocator, so gets the whole ID space to itself
+        self._unique_int_cols = []
+        # with multiple workers, the parent process only checks, formats, and writes rows
+        self._is_parent = self.args.workers > 1 and not self.worker
 
-        self._prepare_city_country()
-        self._prepare_schema()
-        self._prepare_allocators()
-
-    def _prepare_city_country(self):
-        conn = sqlite3.connect("db/gensql.db")
-        cursor = conn.cursor()
-        if "country" in self.tbl_cols or "city" in self.tbl_cols:
-            if "country" in self.tbl_cols and "city" in self.tbl_cols:
-                self.city_index = [
-                    i for i, (k, v) in enumerate(self.schema.items()) if k == "city"
-                ][0]
-                self.country_index = [
-                    i for i, (k, v) in enumerate(self.schema.items()) if k == "country"
-                ][0]
-                # city must be evaluated first for proper country selection
-                # but we can swap them back at the end to match the desired schema
-                if self.city_index > self.country_index:
-                    self.logger.debug(
-                        "Performing in-memory city/country swap for performance"
-                    )
-                    self.city_country_swapped = True
-                    temp_schema = list(self.schema.items())
-                    temp_schema[self.city_index], temp_schema[self.country_index] = (
-                        temp_schema[self.country_index],
-                        temp_schema[self.city_index],
-                    )
-                    self.schema = dict(temp_schema)
-            if self.args.country and not self.args.country == "random":
-                city_query = f"""SELECT c.city, c.country FROM cities c WHERE
-                    c.country = (SELECT cc.country FROM countries cc WHERE
-                    cc.code = '{self.args.country.upper()}')"""
-                cursor.execute(city_query)
-                self.cities, self.countries = zip(*cursor.fetchall())
-            elif self.args.country == "random" and not "phone" in self.tbl_cols:
-                city_query = "SELECT c.city, c.country FROM cities c"
-                cursor.execute(city_query)
-                self.cities, self.countries = zip(*cursor.fetchall())
-            elif self.args.country == "random" and "phone" in self.tbl_cols:
-                city_query = f"""SELECT c.city, c.country FROM cities c WHERE
-                    c.country IN ((SELECT cc.country FROM countries cc WHERE
-                    cc.code IN ({PHONE_NUMBERS.keys()}))"""
-                cursor.execute(city_query)
-                self.cities, self.countries = zip(*cursor.fetchall())
-            self.num_rows_cities = len(self.cities)
-            conn.close()
+        phase = self.profiler.time if self.profiler else lambda _: nullcontext()
+        with phase("load references"):
+            # the pack stays mapped for the life of the process, as the generators
+            # look items up in it, rather than each process having its own copy
+            self.pack = ReferencePack.load()
+            if self._is_parent and self.pack:
+                self.pack.close()
+                self.pack = None
+            if not self._is_parent:
+                self._prepare_places()
+                self._prepare_schema()
+        with phase("set up allocators"):
+            self._prepare_allocators()
+        if not self._is_parent:
+            self._compile_plan()
+        if self.profiler:
+            self._profile()
+
+    @staticmethod
+    def make_seeds(master: int | None = None) -> dict[str, int]:
+        """
+        Derives the seeds of a run from a single master seed, which is random
+        unless given, e.g. with --seed.
+        """
+        if master is None:
+            master = int.from_bytes(urandom(8), "little")
+        master %= 2**64
+        rng = random.Random(master)
+        # dates are made up to this, rather than the time each process starts
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        return {
+            "master": master,
+            "dates_end": int(today.timestamp()),
+            "monotonic_id": rng.getrandbits(32),
+            "unique_id": rng.getrandbits(32),
+            "email_id": rng.getrandbits(64),
+            "random_id": rng.getrandbits(32),
+            "float_whole_id": rng.getrandbits(32),
+            "float_fractional_id": rng.getrandbits(32),
+        }
+
+    def _prepare_places(self):
+        """
+        Loads every city, its country, and that country's code into parallel
+        lists, so that city, country, and phone can all be derived from a single
+        index drawn per row, and always agree with each other. The rows that can
+        be drawn, e.g. with --country, are kept as a list of indices into them.
+        With a pack, the cities and countries are its sections.
+        """
+        if not {"city", "country", "phone"} & self.tbl_cols.keys():
+            return
+        if self.pack:
+            self.cities = self.pack["cities"]
+            self.countries = self.pack["city_countries"]
+            # these are only needed to work out each row's code
+            countries = self.countries.tolist()
+            codes = zip(
+                self.pack["countries"].tolist(), self.pack["country_codes"].tolist()
+            )
+        else:
+            conn = sqlite3.connect("db/gensql.db")
+            try:
+                self.cities, self.countries = zip(
+                    *conn.execute("SELECT city, country FROM cities")
+                )
+                codes = conn.execute("SELECT country, code FROM countries").fetchall()
+            finally:
+                conn.close()
+            countries = self.countries
+        codes = {country: code.lower() for country, code in codes}
+        self.country_codes = [codes.get(country, "") for country in countries]
+        if self.args.country != "random":
+            keep = lambda code: code == self.args.country
+        elif "phone" in self.tbl_cols:
+            # only countries that phone numbers can be made for
+            keep = lambda code: code in PHONE_NUMBERS
+        else:
+            keep = lambda code: True
+        self.place_rows = [i for i, c in enumerate(self.country_codes) if keep(c)]
+        self.num_rows_cities = len(self.place_rows)
+
+    def _read_lines(self, name: str) -> list[str] | PackedList:
+        if self.pack:
+            return self.pack[name]
+        with open(f"content/{name}.txt", "r") as f:
+            return f.read().splitlines()
 
     def _prepare_schema(self):
+        if any("timestamp" in v.values() for v in self.schema.values()):
+            cache = DATES_CACHE if os.path.exists(DATES_CACHE) else None
+            end = datetime.fromtimestamp(self.seeds["dates_end"])
+            self.timestamps = Timestamps(DATES_START, end, cache)
         try:
-            with open("content/dates.txt", "r") as f:
-                self.dates = f.readlines()
-        except FileNotFoundError:
-            self.dates = Generator(self.args).make_dates(self.args.num)
-        try:
-            if "first_name" in self.tbl_cols or "full_name" in self.tbl_cols:
-                with open("content/first_names.txt", "r") as f:
-                    self.first_names = f.read().splitlines()
+            # email falls back to sampling names if the row doesn't have any
+            if (
+                "first_name" in self.tbl_cols
+                or "full_name" in self.tbl_cols
+                or "email" in self.tbl_cols
+            ):
+                self.first_names = self._read_lines("first_names")
                 self.num_rows_first_names = len(self.first_names)
-            if "last_name" in self.tbl_cols or "full_name" in self.tbl_cols:
-                with open("content/last_names.txt", "r") as f:
-                    self.last_names = f.read().splitlines()
+            if (
+                "last_name" in self.tbl_cols
+                or "full_name" in self.tbl_cols
+                or "email" in self.tbl_cols
+            ):
+                self.last_names = self._read_lines("last_names")
                 self.num_rows_last_names = len(self.last_names)
             if "email" in self.tbl_cols or [
                 "json" in x.values() for x in self.tbl_cols.values()
             ]:
-                with open("content/wordlist.txt", "r") as f:
-                    self.wordlist = f.read().splitlines()
+                self.wordlist = self._read_lines("wordlist")
                 self.num_rows_wordlist = len(self.wordlist)
             if ["text" in x.values() for x in self.tbl_cols.values()]:
-                with open("content/lorem_ipsum.txt", "r") as f:
-                    self.lorem_ipsum = f.read().splitlines()
+                self.lorem_ipsum = self._read_lines("lorem_ipsum")
                 self.num_rows_lorem_ipsum = len(self.lorem_ipsum)
         except FileNotFoundError as e:
             raise FileNotFoundError(f"unable to load necessary content\n{e}")
@@ -126,6 +319,8 @@ class Runner:
             for k, v in self.schema.items()
             if "int" in v["type"] or v["type"] in ["decimal", "double", "int"]
         }
+        # how many values each integer column with a distribution is drawn from
+        self._value_counts = {}
         for k, v in numeric_cols.items():
             if "unsigned" in v["type"]:
                 col_max_val = MYSQL_INT_MIN_MAX[
@@ -138,10 +333,17 @@ class Runner:
                 col_max_val = MYSQL_INT_MIN_MAX[
                     f"MYSQL_MAX_{v['type'].upper().split()[0]}_SIGNED"
                 ]
-            if v.get("auto_inc"):
+            if set(v) & SKEW_OPTIONS:
+                num_values = int(v.get("distinct", self.args.num))
+                self._value_counts[k] = int(min(num_values, col_max_val))
+            # monotonic integers are the row number, so are already unique
+            monotonic = "int" in v["type"] and v.get("order") == "monotonic"
+            if monotonic:
                 self._has_monotonic = True
             if v.get("unique"):
                 self._has_unique = True
+                if "int" in v["type"] and not v.get("auto_increment") and not monotonic:
+                    self._unique_int_cols.append(k)
                 self.rand_max_id = self.args.num
                 if self.args.num > col_max_val:
                     raise TooManyRowsError(k, self.args.num, col_max_val) from None
@@ -153,25 +355,53 @@ class Runner:
                 else:
                     self.rand_max_id = self.args.num
 
+        if self._is_parent:
+            return
         if self._has_float:
-            self.float_whole_id = self.allocator(0, self.args.num, shuffle=True)
+            self.float_whole_id = self.allocator(
+                0,
+                self.args.num,
+                shuffle=True,
+                seed=self.seeds["float_whole_id"],
+                cycle=True,
+            )
             self.float_fractional_id = self.allocator(
-                0, 999999, ranged_arr=True, shuffle=True
+                0,
+                999999,
+                ranged_arr=True,
+                shuffle=True,
+                seed=self.seeds["float_fractional_id"],
+                cycle=True,
             )
         if self._has_monotonic:
-            self.monotonic_id = self.allocator(0, self.args.num)
-        try:
-            self.random_id = self.allocator(0, self.rand_max_id, shuffle=True)
-        except AttributeError:
-            self.random_id = self.allocator(0, self.args.num, shuffle=True)
-        if self._has_unique:
-            self.unique_id = self.allocator(0, self.args.num, shuffle=True)
+            self.monotonic_id = self.allocator(
+                0, self.args.num, seed=self.seeds["monotonic_id"]
+            )
+        # random IDs cycle around once they're used up, as uniquity isn't required
+        rand_max_id = getattr(self, "rand_max_id", self.args.num)
+        self.random_id = self.allocator(
+            0, rand_max_id, shuffle=True, seed=self.seeds["random_id"], cycle=True
+        )
+        self.unique_ids = {
+            col: self.allocator(
+                0, self.args.num, shuffle=True, seed=self.seeds["unique_id"] + i
+            )
+            for i, col in enumerate(self._unique_int_cols)
+        }
         for k, v in self.schema.items():
             if "uuid" in k:
-                if v.get("uuid_v4", "true") in ("True", "true"):
-                    self.random_uuid = self.uuid_allocator(self.args.num, True)
+                if v.get("uuid_version"):
+                    uuid_version = int(v["uuid_version"])
+                elif v.get("uuid_v4", "true") in ("True", "true"):
+                    uuid_version = 4
                 else:
-                    self.random_uuid = self.uuid_allocator(self.args.num, False)
+                    uuid_version = 1
+                self.random_uuid = self.uuid_allocator(self.args.num, uuid_version)
+        if "email" in self.constructed_uniques:
+            # random access, so any worker can number any chunk of rows
+            self.email_id = utilities.PermutationAllocator(
+                0, self.args.num, shuffle=True, seed=self.seeds["email_id"]
+            )
 
     # refactoring this to use allocate() with smaller lists for each type
     # was significantly slower than the current method - may revisit later
@@ -186,338 +416,1343 @@ class Runner:
             sample_list.append(iterable[idx])
         return sample_list
 
-    def make_row(self, idx: int, has_timestamp: bool) -> dict:
-        row = {}
-        if has_timestamp:
-            date = self.sample(self.dates, self.args.num)
+    def choices(self, pool: list | PackedList, k: int) -> list:
+        """
+        Picks k items from pool (with replacement) in a single bulk draw, using
+        NumPy if it's installed. A PackedList is looked up in a single batch.
+        """
+        if np is not None:
+            idx = self.rng.integers(0, len(pool), k).tolist()
+        elif isinstance(pool, PackedList):
+            # the same draws random.choices() would make from a list
+            idx = random.choices(range(len(pool)), k=k)
+        else:
+            return random.choices(pool, k=k)
+        return _take(pool, idx)
+
+    def _compile_plan(self):
+        """
+        Resolves every column's options once, and compiles the schema into an
+        ordered list of (column, generator, formatter) triples.
+
+        Generators are called as gen(start, stop, state), and return the raw values
+        of their column for rows [start, stop) in one block. state is a dict shared
+        by the generators of a single chunk, e.g. so that email can reuse the names
+        picked for first_name and last_name. Formatters then turn a whole column of
+        raw values into SQL literals.
+        """
+        self.plan = []
+        rand = random.random
+        args = self.args
+        choices = self.choices
+
+        def picker(col, pool, shuffle=True):
+            """
+            Returns pick(k), which draws k values from pool for col: uniformly,
+            unless it has a distribution or distinct option, in which case they're
+            drawn through an alias table. The ranks of the distribution are the
+            order of pool, which is shuffled first (the same way in every process)
+            so that e.g. the most common name isn't just the first alphabetically.
+            """
+            opts = self.schema.get(col, {})
+            if not set(opts) & SKEW_OPTIONS:
+                return lambda k, p=pool: choices(p, k)
+            # the ranks are indices into pool, so it isn't copied
+            ranks = range(len(pool))
+            if shuffle:
+                ranks = list(ranks)
+                random.Random(f"{self.seeds['master']} {col}").shuffle(ranks)
+            ranks = ranks[: int(opts.get("distinct", len(pool)))]
+            sampler = AliasSampler.from_distribution(
+                opts.get("distribution", "uniform"), len(ranks)
+            )
+
+            def pick(k, p=pool, sample=sampler.sample):
+                rng = self.rng if np is not None else None
+                return _take(p, [ranks[i] for i in sample(k, rng)])
+
+            return pick
+
+        if {"city", "country", "phone"} & self.schema.keys():
+            # city, country, and phone share a draw, so only one of them can skew it
+            country = self.schema.get("country", {})
+            place_col = "country" if set(country) & SKEW_OPTIONS else "city"
+            pick_place = picker(place_col, self.place_rows)
+
+        def places(start, stop, state):
+            # the first of city, country, and phone in a chunk picks the places
+            if "place" not in state:
+                state["place"] = pick_place(stop - start)
+            return state["place"]
+
+        def epochs(col, start, stop, state):
+            # made the first time they're needed, as a column can be after a later one
+            key = f"epochs {col}"
+            if key not in state:
+                opts = self.schema[col]
+                rng = self.rng if np is not None else None
+                if opts.get("order") == "monotonic":
+                    state[key] = self.timestamps.monotonic(start, stop, args.num, rng)
+                elif opts.get("after"):
+                    before = epochs(opts["after"], start, stop, state)
+                    state[key] = self.timestamps.after(before, rng)
+                else:
+                    state[key] = state["date"]
+            return state[key]
+
         for col, opts in self.schema.items():
+            col_type = opts.get("type")
+            fmt = _quote
             if opts.get("is_empty"):
                 continue
-            if "int" in opts.get("type"):
+            if "int" in col_type:
+                fmt = _literal
                 if opts.get("auto_increment"):
-                    # may or may not just remove this, for now pass is fine
-                    pass
-                    # row[col] = self.monotonic_id.allocate()
+                    # may or may not just remove this, for now skipping is fine
+                    continue
+                elif opts.get("order") == "monotonic":
+
+                    def gen(start, stop, state, a=self.monotonic_id):
+                        return a.allocate_many(stop - start)
+
                 elif opts.get("unique"):
-                    row[col] = self.unique_id.allocate()
+
+                    def gen(start, stop, state, a=self.unique_ids[col]):
+                        return a.allocate_many(stop - start)
+
+                elif col in self._value_counts:
+                    # ranked in order, so e.g. zipf makes the smallest IDs the most common
+                    values = range(1, self._value_counts[col] + 1)
+
+                    def gen(start, stop, state, p=picker(col, values, shuffle=False)):
+                        return p(stop - start)
+
                 else:
-                    row[col] = self.random_id.allocate()
-                    # these are appended to the right of the deque, so they won't be immediately repeated
-                    self.random_id.release(row[col])
 
-            elif opts.get("type") in ["decimal", "double"]:
+                    def gen(start, stop, state, a=self.random_id):
+                        return a.allocate_many(stop - start)
+
+            elif col_type in ["decimal", "double"]:
                 # TODO: Figure out why this fails with unique checks
                 if opts.get("unique"):
-                    whole = self.float_whole_id.allocate()
-                    fractional = self.float_fractional_id.allocate()
-                    row[col] = f"{whole}.{fractional}"
-                else:
-                    whole = self.float_whole_id.allocate()
-                    fractional = self.float_fractional_id.allocate()
-                    row[col] = f"'{whole}.{fractional}'"
-                    self.float_whole_id.release(whole)
-                    self.float_fractional_id.release(fractional)
+                    fmt = _literal
+
+                def gen(
+                    start,
+                    stop,
+                    state,
+                    w=self.float_whole_id,
+                    f=self.float_fractional_id,
+                ):
+                    num = stop - start
+                    return [
+                        f"{whole}.{fractional}"
+                        for whole, fractional in zip(
+                            w.allocate_many(num), f.allocate_many(num)
+                        )
+                    ]
 
             elif col == "first_name":
-                random_first = self.sample(self.first_names, self.num_rows_first_names)
-                first_name = f"{random_first}".replace("'", "''")
-                row[col] = f"'{first_name}'"
+
+                def gen(start, stop, state, p=picker(col, self.first_names)):
+                    state["first"] = p(stop - start)
+                    return state["first"]
 
             elif col == "last_name":
-                random_last = self.sample(self.last_names, self.num_rows_last_names)
-                last_name = f"{random_last}".replace("'", "''")
-                row[col] = f"'{last_name}'"
+
+                def gen(start, stop, state, p=picker(col, self.last_names)):
+                    state["last"] = p(stop - start)
+                    return state["last"]
 
             elif col == "full_name":
-                random_first = self.sample(self.first_names, self.num_rows_first_names)
-                random_last = self.sample(self.last_names, self.num_rows_last_names)
-                full_name = f"{random_last}, {random_first}".replace("'", "''")
-                row[col] = f"'{full_name}'"
+
+                def gen(start, stop, state, pf=self.first_names, pl=self.last_names):
+                    state["first"] = choices(pf, stop - start)
+                    state["last"] = choices(pl, stop - start)
+                    return [
+                        f"{last}, {first}"
+                        for first, last in zip(state["first"], state["last"])
+                    ]
 
             elif col == "uuid":
-                random_uuid = self.random_uuid.allocate()
-                if "char" in opts["type"]:
-                    row[col] = f"'{random_uuid}'"
-                elif "binary" in opts["type"]:
-                    row[col] = f"UUID_TO_BIN('{random_uuid}')"
-            elif opts.get("type") == "json":
-                max_rows_pct = float(opts.get("max_length", DEFAULT_MAX_FIELD_PCT))
-                if self.args.random:
-                    json_arr_len = ceil(
-                        random.random() * (JSON_OBJ_MAX_VALS - 1) * max_rows_pct
-                    )
+                if "char" in col_type:
+                    pass
+                elif "binary" in col_type:
+                    fmt = _uuid_to_bin
                 else:
-                    json_arr_len = ceil((JSON_OBJ_MAX_VALS - 1) * max_rows_pct)
-                if self.schema[col].get("is_numeric_array"):
-                    rand_id_list = []
-                    # make 5% of the JSON arrays filled with random integers
-                    if not idx % 20:
-                        for i in range(json_arr_len):
-                            rand_id = self.random_id.allocate()
-                            rand_id_list.append(str(rand_id))
-                            self.random_id.release(rand_id)
-                        rand_ids = ",".join(rand_id_list)
-                        row[col] = f"'[{rand_ids}]'"
-                    else:
-                        row[col] = "'[]'"
+                    continue
+
+                def gen(start, stop, state, a=self.random_uuid, b="binary" in col_type):
+                    return a.allocate_many(stop - start, binary=b)
+
+            elif col_type == "json":
+                max_rows_pct = float(opts.get("max_length", DEFAULT_MAX_FIELD_PCT))
+                json_arr_len = ceil((JSON_OBJ_MAX_VALS - 1) * max_rows_pct)
+                if opts.get("is_numeric_array"):
+
+                    def gen(start, stop, state, a=self.random_id, pct=max_rows_pct):
+                        vals = []
+                        for idx in range(start, stop):
+                            # make 5% of the JSON arrays filled with random integers
+                            if idx % 20:
+                                vals.append("[]")
+                                continue
+                            if args.random:
+                                arr_len = ceil(rand() * (JSON_OBJ_MAX_VALS - 1) * pct)
+                            else:
+                                arr_len = json_arr_len
+                            rand_ids = a.allocate_many(arr_len)
+                            vals.append(f"[{','.join(map(str, rand_ids))}]")
+                        return vals
+
                 else:
-                    json_dict = {}
-                    # may or may not want to use this again
-                    # json_keys = self.sample(
-                    #    self.wordlist, self.num_rows_wordlist, JSON_OBJ_MAX_KEYS
-                    # )
-                    json_keys = copy(JSON_DEFAULT_KEYS)
-                    # grab an extra for use with email if needed
-                    # this is an order of magnitude slower than the sample method - guessing it's all the function calls
-                    # json_indices = frozenset(str(ceil(random.random() * self.num_rows_wordlist)) for x in range(JSON_OBJ_MAX_VALS + 1))
-                    # json_vals = self.utils.get_word(json_indices)
-                    json_vals = self.sample(
-                        self.wordlist, self.num_rows_wordlist, JSON_OBJ_MAX_VALS + 1
-                    )
-                    json_dict[json_keys.pop()] = json_vals.pop()
-                    # make 20% of the JSON objects nested
-                    if not self.args.fixed_length:
-                        if not idx % 5:
-                            key = json_keys.pop()
-                            json_dict[key] = {}
-                            json_dict[key][json_keys.pop()] = [
-                                json_vals.pop() for _ in range(json_arr_len)
+                    # JSON_DEFAULT_KEYS is reversed, so these are the keys pop() would give
+                    key_0, key_1, key_2 = JSON_DEFAULT_KEYS[-1:-4:-1]
+                    # make 20% of the JSON objects nested, unless --fixed-length always does
+                    nest_every = 1 if args.fixed_length else 5
+
+                    def gen(start, stop, state, p=self.wordlist, pct=max_rows_pct):
+                        rows = range(start, stop)
+                        if args.random:
+                            arr_lens = [
+                                ceil(rand() * (JSON_OBJ_MAX_VALS - 1) * pct)
+                                for _ in rows
                             ]
-                    else:
-                        key = json_keys.pop()
-                        json_dict[key] = {}
-                        json_dict[key][json_keys.pop()] = [
-                            json_vals.pop() for _ in range(json_arr_len)
-                        ]
-                    row[col] = f"'{json.dumps(json_dict)}'"
+                        else:
+                            arr_lens = [json_arr_len] * len(rows)
+                        nested = [not idx % nest_every for idx in rows]
+                        # only draw the words that will be used, plus an extra per row for use with email
+                        num_words = 2 * len(rows) + sum(
+                            n for n, is_nested in zip(arr_lens, nested) if is_nested
+                        )
+                        words = iter(choices(p, num_words))
+                        vals = []
+                        extras = []
+                        for arr_len, is_nested in zip(arr_lens, nested):
+                            json_dict = {key_0: next(words)}
+                            if is_nested:
+                                json_dict[key_1] = {
+                                    key_2: [next(words) for _ in range(arr_len)]
+                                }
+                            vals.append(json.dumps(json_dict))
+                            extras.append(next(words))
+                        state["json_extra"] = extras
+                        return vals
 
             elif col == "city":
-                city = self.sample(list(self.cities), self.num_rows_cities).replace(
-                    "'", "''"
-                )
-                row[col] = f"'{city}'"
+
+                def gen(start, stop, state, p=self.cities):
+                    return _take(p, places(start, stop, state))
+
             elif col == "country":
-                if self.args.country and not self.args.country == "random":
-                    country = self.countries[0]
-                else:
-                    try:
-                        country = self.utils.get_country(city)
-                    except (KeyError, UnboundLocalError):
-                        # since city is guaranteed to come first, if this is hit
-                        # there is no city column defined in the schema
-                        country = self.sample(
-                            list(self.countries), self.num_rows_cities
-                        ).replace("'", "''")
-                row[col] = f"'{country}'"
+
+                def gen(start, stop, state, p=self.countries):
+                    return _take(p, places(start, stop, state))
 
             elif col == "email":
-                try:
-                    email_domain = json_vals.pop()
-                except UnboundLocalError:
-                    email_domain = self.sample(self.wordlist, self.num_rows_wordlist)
-                try:
-                    email_local = f"{random_first}.{random_last}"
-                except UnboundLocalError:
-                    email_first = self.sample(
-                        self.first_names, self.num_rows_first_names
-                    )
-                    email_last = self.sample(self.last_names, self.num_rows_last_names)
-                    email_local = f"{email_first}.{email_last}"
-                email_local = email_local.lower().replace("'", "''")
-                row[col] = f"'{email_local}@{email_domain}.com'"
+
+                def gen(
+                    start,
+                    stop,
+                    state,
+                    pw=self.wordlist,
+                    pf=self.first_names,
+                    pl=self.last_names,
+                ):
+                    num = stop - start
+                    domains = state.get("json_extra") or choices(pw, num)
+                    if "first" in state and "last" in state:
+                        firsts, lasts = state["first"], state["last"]
+                    else:
+                        firsts, lasts = choices(pf, num), choices(pl, num)
+                    if "email" in self.constructed_uniques:
+                        # each row gets its own number, so no two emails can match
+                        self.email_id.seek(start - 1, num)
+                        return [
+                            f"{f}.{l}{n}".lower() + f"@{d}.com"
+                            for f, l, d, n in zip(
+                                firsts, lasts, domains, self.email_id.allocate_many(num)
+                            )
+                        ]
+                    return [
+                        f"{f}.{l}".lower() + f"@{d}.com"
+                        for f, l, d in zip(firsts, lasts, domains)
+                    ]
+
             elif col == "phone":
+                # rows that can't be drawn may not have a format
+                phone_fmts = [PHONE_NUMBERS.get(code) for code in self.country_codes]
                 phone_digits = [str(x) for x in range(10)]
-                random.shuffle(phone_digits)
-                phone_str = "".join(phone_digits)
-                row[col] = f"'{PHONE_NUMBERS[self.args.country](phone_str)}'"
-            elif self.schema[col]["type"] == "text":
+
+                def gen(start, stop, state, p=phone_fmts):
+                    return [
+                        p[i]("".join(random.sample(phone_digits, 10)))
+                        for i in places(start, stop, state)
+                    ]
+
+            elif col_type == "text":
                 max_rows_pct = float(opts.get("max_length", DEFAULT_MAX_FIELD_PCT))
-                # e.g. if max_rows_pct is 0.15, with 25 rows in lorem ipsum, we get a range of 1-4 rows
-                if not self.args.fixed_length:
-                    if self.args.random:
-                        lorem_rows = ceil(
-                            random.random() * self.num_rows_lorem_ipsum * max_rows_pct
-                        )
+                max_lorem_rows = ceil(self.num_rows_lorem_ipsum * max_rows_pct)
+                lorem_scale = self.num_rows_lorem_ipsum * max_rows_pct
+
+                def gen(start, stop, state, p=self.lorem_ipsum):
+                    rows = range(start, stop)
+                    if args.fixed_length:
+                        return [p[0]] * len(rows)
+                    # e.g. if max_rows_pct is 0.15, with 25 rows in lorem ipsum, we get a range of 1-4 rows
+                    if args.random:
+                        lorem_rows = [ceil(rand() * lorem_scale) for _ in rows]
                     # otherwise, default to a single row, but 20% of the time use the maximum allowed
                     else:
-                        lorem_rows = 1
-                        if not idx % 5:
-                            lorem_rows = ceil(self.num_rows_lorem_ipsum * max_rows_pct)
-                else:
-                    lorem_rows = 1
-                if lorem_rows > 1:
-                    row[
-                        col
-                    ] = f"'{' '.join(self.sample(self.lorem_ipsum, self.num_rows_lorem_ipsum, lorem_rows))}'"
-                # sample() returns a string rather than a list if n=1, so skip that entirely and just use the first row of lorem
-                else:
-                    row[col] = f"'{self.lorem_ipsum[0]}'"
+                        lorem_rows = [1 if idx % 5 else max_lorem_rows for idx in rows]
+                    paragraphs = iter(choices(p, sum(n for n in lorem_rows if n > 1)))
+                    # a single row always uses the first row of lorem
+                    return [
+                        " ".join(next(paragraphs) for _ in range(n)) if n > 1 else p[0]
+                        for n in lorem_rows
+                    ]
 
-            elif opts.get("type") == "timestamp":
-                row[col] = date
-        return row
+            elif col_type == "timestamp" and args.copy_binary and not args.sink:
+                # binary COPY encodes the epochs themselves, so they're left as is
+
+                def gen(start, stop, state, c=col):
+                    e = epochs(c, start, stop, state)
+                    return (
+                        e.tolist()
+                        if np is not None and isinstance(e, np.ndarray)
+                        else e
+                    )
+
+            elif col_type == "timestamp":
+
+                def gen(start, stop, state, c=col, f=self.timestamps.format):
+                    return f(epochs(c, start, stop, state))
+
+            else:
+                continue
+            self.plan.append((col, gen, fmt))
+        self.plan_cols = [col for col, _, _ in self.plan]
+
+    def _profile(self):
+        """
+        Wraps each stage of making and writing a chunk, for --profile to time.
+        """
+        p = self.profiler
+        if not self._is_parent:
+            self.plan = [
+                (col, p.wrap(f"generate {col}", gen), p.wrap(f"format {col}", fmt))
+                for col, gen, fmt in self.plan
+            ]
+            for col, allocator in self.unique_ids.items():
+                allocator.allocate_many = p.wrap(
+                    f"allocate unique_id {col}", allocator.allocate_many
+                )
+            for name in (
+                "monotonic_id",
+                "random_id",
+                "float_whole_id",
+                "float_fractional_id",
+                "email_id",
+                "random_uuid",
+            ):
+                allocator = getattr(self, name, None)
+                if allocator is not None:
+                    allocator.allocate_many = p.wrap(
+                        f"allocate {name}", allocator.allocate_many
+                    )
+            self.draw_dates = p.wrap("draw dates", self.draw_dates)
+        if not self.worker:
+            self.check_unique = p.wrap(
+                "check unique", self.check_unique, count=lambda vals, _: len(vals)
+            )
+            self.finish_rows = p.wrap("finish rows", self.finish_rows, "rows")
+            self.make_chunk = p.wrap("encode", self.make_chunk, "rows", count=len)
+
+    def report_profile(self):
+        """
+        Prints the --profile table for the rows this run has made.
+        """
+        self.profiler.report(self.profiler.stats["finish rows"][1])
+
+    def write_metrics(self):
+        """
+        Writes the --metrics of this run to each of the paths given.
+        """
+        metrics = Metrics(self.args, self.tbl_name, self.profiler, self.outputs)
+        for path in self.args.metrics:
+            metrics.write(path)
+
+    def draw_dates(self, num: int) -> list[int]:
+        rng = self.rng if np is not None else None
+        return self.timestamps.draw(num, rng)
+
+    def make_columns(
+        self, start: int, stop: int, has_timestamp: bool, raw: bool = False
+    ) -> list[list]:
+        """
+        Makes rows [start, stop) one whole column at a time, returning the
+        formatted columns in plan order, or their raw values if raw is set.
+        """
+        state = {}
+        if has_timestamp:
+            state["date"] = self.draw_dates(stop - start)
+        if raw:
+            return [gen(start, stop, state) for _, gen, _ in self.plan]
+        return [fmt(gen(start, stop, state)) for _, gen, fmt in self.plan]
+
+    def make_row(self, idx: int, has_timestamp: bool) -> dict:
+        columns = self.make_columns(idx, idx + 1, has_timestamp)
+        return {col: vals[0] for col, vals in zip(self.plan_cols, columns)}
+
+    def make_csv_header(self) -> list:
+        return [f"{','.join(self.tbl_cols)}\n"]
+
+    def make_csv_chunk(self, vals: list) -> list:
+        return [f"{row}\n" for row in vals]
 
     def make_csv_rows(self, vals: list) -> list:
-        insert_rows = []
-        insert_rows.append(f"{','.join(self.tbl_cols)}\n")
-        for row in vals:
-            insert_rows.append(f"{row}\n")
+        return self.make_csv_header() + self.make_csv_chunk(vals)
 
+    def make_sql_header(self, sql_type: str, lock: bool = True) -> list:
+        """
+        Makes the session setup for a .sql file. lock can be disabled for files
+        that are meant to be loaded concurrently, which a table lock would serialize.
+        """
+        insert_rows = []
+        if sql_type == "mysql":
+            insert_rows.extend(f"{stmt};\n" for stmt in MYSQL_SESSION_SETUP)
+            if lock:
+                insert_rows.append(f"LOCK TABLES `{self.tbl_name}` WRITE;\n")
+        elif sql_type == "postgres":
+            insert_rows.append("BEGIN;\n")
+            if lock:
+                insert_rows.append(
+                    f"LOCK TABLE {self.tbl_name} IN ACCESS EXCLUSIVE MODE;\n"
+                )
+        else:
+            raise UnsupportedRDBMSError(sql_type) from None
         return insert_rows
 
-    def make_sql_rows(self, vals: list, sql_type: str) -> list:
+    def make_sql_chunk(self, vals: list, sql_type: str) -> list:
+        """
+        Makes the INSERT statement(s) for a single chunk of rows. Unless --no-chunk
+        is set, a chunk is at most DEFAULT_INSERT_CHUNK_SIZE rows, and is emitted
+        as a single multi-row INSERT.
+        """
         insert_rows = []
         if sql_type == "mysql":
-            insert_rows.append("SET @@time_zone = '+00:00';\n")
-            insert_rows.append("SET @@autocommit = 0;\n")
-            insert_rows.append("SET @@unique_checks = 0;\n")
-            insert_rows.append(f"LOCK TABLES `{self.tbl_name}` WRITE;\n")
-            if not self.args.no_chunk:
-                for i in range(0, len(vals), DEFAULT_INSERT_CHUNK_SIZE):
-                    insert_rows.append(
-                        f"INSERT INTO `{self.tbl_name}` (`{'`, `'.join(self.tbl_cols)}`) VALUES\n"
-                    )
-                    chunk_list = vals[i : i + DEFAULT_INSERT_CHUNK_SIZE]
-                    for row in chunk_list:
-                        insert_rows.append(f"({row}),\n")
-                    # if we reach the end of a chunk list, make the multi-insert statement a single
-                    # query by swapping the last comma to a semi-colon
-                    insert_rows[-1] = insert_rows[-1][::-1].replace(",", ";", 1)[::-1]
-            else:
-                for row in vals:
-                    insert_rows.append(
-                        f"INSERT INTO `{self.tbl_name}` (`{'`, `'.join(self.tbl_cols)}`) VALUES ({row});\n"
-                    )
+            insert_stmt = (
+                f"INSERT INTO `{self.tbl_name}` (`{'`, `'.join(self.tbl_cols)}`) VALUES"
+            )
         elif sql_type == "postgres":
-            insert_rows.append("BEGIN;\n")
-            insert_rows.append(
-                f"LOCK TABLE {self.tbl_name} IN ACCESS EXCLUSIVE MODE;\n"
+            insert_stmt = (
+                f"INSERT INTO {self.tbl_name} ({', '.join(self.tbl_cols)}) VALUES"
             )
-            if not self.args.no_chunk:
-                for i in range(0, len(vals), DEFAULT_INSERT_CHUNK_SIZE):
-                    insert_rows.append(
-                        f"INSERT INTO {self.tbl_name} ({', '.join(self.tbl_cols)}) VALUES\n"
-                    )
-                    chunk_list = vals[i : i + DEFAULT_INSERT_CHUNK_SIZE]
-                    for row in chunk_list:
-                        insert_rows.append(f"({row}),\n")
-                    # if we reach the end of a chunk list, make the multi-insert statement a single
-                    # query by swapping the last comma to a semi-colon
-                    insert_rows[-1] = insert_rows[-1][::-1].replace(",", ";", 1)[::-1]
-            else:
-                for row in vals:
-                    insert_rows.append(
-                        f"INSERT INTO {self.tbl_name} ({', '.join(self.tbl_cols)}) VALUES ({row});\n"
-                    )
         else:
             raise UnsupportedRDBMSError(sql_type) from None
+        if self.args.max_packet:
+            return self.make_sql_packets(vals, insert_stmt)
+        if not self.args.no_chunk:
+            for i in range(0, len(vals), DEFAULT_INSERT_CHUNK_SIZE):
+                insert_rows.append(f"{insert_stmt}\n")
+                chunk_list = vals[i : i + DEFAULT_INSERT_CHUNK_SIZE]
+                for row in chunk_list:
+                    insert_rows.append(f"({row}),\n")
+                # if we reach the end of a chunk list, make the multi-insert statement a single
+                # query by swapping the last comma to a semi-colon
+                insert_rows[-1] = insert_rows[-1][::-1].replace(",", ";", 1)[::-1]
+        else:
+            for row in vals:
+                insert_rows.append(f"{insert_stmt} ({row});\n")
+        return insert_rows
+
+    def make_sql_packets(self, vals: list, insert_stmt: str) -> list:
+        """
+        Makes multi-row INSERTs that are each closed just before they'd exceed
+        --max-packet bytes, measured on the formatted rows. Rows are written with
+        a leading comma, so that a statement can stay open across chunks until the
+        next one needs to start, or the footer closes it.
+        """
+        max_packet = self.args.max_packet
+        stmt_size = len(insert_stmt.encode()) + 1
+        insert_rows = []
+        size = self._packet_size
+        for row in vals:
+            # the row's parentheses are included; ",\n" and ";\n" are two bytes each
+            row_size = (len(row) if row.isascii() else len(row.encode())) + 2
+            if size and size + row_size + 4 > max_packet:
+                insert_rows.append(";\n")
+                size = 0
+            if not size:
+                if stmt_size + row_size + 2 > max_packet and not self._packet_warned:
+                    self.logger.warning(
+                        f"a single row is larger than --max-packet {max_packet}, "
+                        "writing it as its own INSERT anyway"
+                    )
+                    self._packet_warned = True
+                insert_rows.append(f"{insert_stmt}\n({row})")
+                size = stmt_size + row_size
+            else:
+                insert_rows.append(f",\n({row})")
+                size += row_size + 2
+        self._packet_size = size
+        return insert_rows
+
+    def make_sql_footer(self, sql_type: str, lock: bool = True) -> list:
+        insert_rows = []
+        if self._packet_size:
+            insert_rows.append(";\n")
+            self._packet_size = 0
         insert_rows.append("COMMIT;\n")
         if sql_type == "mysql":
-            insert_rows.append("SET @@autocommit = 1;\n")
-            insert_rows.append("SET @@unique_checks = 1;\n")
-            insert_rows.append("SET @@time_zone = (SELECT @@GLOBAL.time_zone);\n")
-            insert_rows.append("UNLOCK TABLES;\n")
-
+            insert_rows.extend(f"{stmt};\n" for stmt in MYSQL_SESSION_TEARDOWN)
+            if lock:
+                insert_rows.append("UNLOCK TABLES;\n")
         return insert_rows
 
+    def make_sql_rows(self, vals: list, sql_type: str) -> list:
+        return (
+            self.make_sql_header(sql_type)
+            + self.make_sql_chunk(vals, sql_type)
+            + self.make_sql_footer(sql_type)
+        )
+
+    def _compile_copy_encoders(self) -> list:
+        """
+        Picks an encoder for each column from its type in the schema. For the
+        text format, an encoder returns the escaped field; for the binary format,
+        it returns the field in network byte order, prefixed by its length.
+        """
+        encoders = []
+        for col in self.tbl_cols:
+            col_type = self.schema[col]["type"]
+            if not self.args.copy_binary:
+                if "int" in col_type:
+                    enc = str
+                elif "binary" in col_type:
+                    # COPY unescapes the doubled backslash, leaving bytea's \\x hex format
+                    enc = lambda v: f"\\\\x{v.hex()}"
+                else:
+                    enc = lambda v: v.translate(_COPY_ESCAPES)
+            elif "int" in col_type:
+                # Postgres has no unsigned types, so this is written as a bigint
+                max_val = max(self.args.num, self._value_counts.get(col, 0))
+                if (
+                    col_type == "bigint unsigned"
+                    and max_val > MYSQL_INT_MIN_MAX["MYSQL_MAX_BIGINT_SIGNED"]
+                ):
+                    raise UnsupportedCopyTypeError(
+                        col,
+                        col_type,
+                        f"column {col} of type {col_type} can be given values up to "
+                        f"{max_val}, which is more than a Postgres bigint can hold",
+                    ) from None
+                int_fmt = struct.Struct(PGCOPY_INT_FORMATS[col_type])
+                enc = lambda v, p=int_fmt.pack, n=int_fmt.size - 4: p(n, v)
+            elif col_type == "timestamp":
+                # the raw values are epochs in seconds, as _compile_plan leaves them
+                enc = lambda v, p=struct.Struct(">iq").pack: p(
+                    8, (v - PG_EPOCH_SECONDS) * 1_000_000
+                )
+            elif col_type == "double":
+                enc = lambda v, p=struct.Struct(">id").pack: p(8, float(v))
+            elif col_type == "decimal":
+                raise UnsupportedCopyTypeError(col, col_type) from None
+            elif "binary" in col_type:
+                enc = lambda v, p=struct.Struct(">i").pack: p(len(v)) + v
+            elif col == "uuid":
+                # a uuid column takes the 16 bytes, not the text
+                enc = lambda v, n=struct.pack(">i", 16): n + UUID(v).bytes
+            else:
+
+                def enc(v, p=struct.Struct(">i").pack):
+                    b = v.encode()
+                    return p(len(b)) + b
+
+            encoders.append(enc)
+        return encoders
+
+    def make_copy_header(self) -> list:
+        self.copy_encoders = self._compile_copy_encoders()
+        if self.args.copy_binary:
+            return [PGCOPY_HEADER]
+        copy_rows = [f"{stmt};\n" for stmt in POSTGRES_SESSION_SETUP]
+        copy_rows.append(
+            f"COPY {self.tbl_name} ({', '.join(self.tbl_cols)}) FROM STDIN;\n"
+        )
+        return copy_rows
+
+    def make_copy_chunk(self, vals: list[tuple]) -> list:
+        """
+        Encodes a chunk of raw rows for COPY; as text, one tab-separated line per
+        row, and as binary, a field count followed by the fields for each row.
+        """
+        encoders = self.copy_encoders
+        if self.args.copy_binary:
+            field_count = struct.pack(">h", len(encoders))
+            return [
+                field_count
+                + b"".join(
+                    _PGCOPY_NULL if v is None else enc(v)
+                    for enc, v in zip(encoders, row)
+                )
+                for row in vals
+            ]
+        return [
+            "\t".join(
+                _COPY_NULL if v is None else enc(v) for enc, v in zip(encoders, row)
+            )
+            + "\n"
+            for row in vals
+        ]
+
+    def make_copy_footer(self) -> list:
+        if self.args.copy_binary:
+            return [PGCOPY_TRAILER]
+        return ["\\.\n"]
+
+    def make_header(self, lock: bool = True) -> list:
+        match self.args.filetype:
+            case "mysql" | "postgres":
+                return self.make_sql_header(self.args.filetype, lock)
+            case "postgres-copy":
+                return self.make_copy_header()
+            case "csv":
+                return self.make_csv_header()
+            case _:
+                raise ValueError(f"{self.args.filetype} is not a valid output format")
+
+    def make_chunk(self, vals: list) -> list:
+        match self.args.filetype:
+            case "mysql" | "postgres":
+                return self.make_sql_chunk(vals, self.args.filetype)
+            case "postgres-copy":
+                return self.make_copy_chunk(vals)
+            case "csv":
+                return self.make_csv_chunk(vals)
+            case _:
+                raise ValueError(f"{self.args.filetype} is not a valid output format")
+
+    def make_footer(self, lock: bool = True) -> list:
+        match self.args.filetype:
+            case "mysql" | "postgres":
+                return self.make_sql_footer(self.args.filetype, lock)
+            case "postgres-copy":
+                return self.make_copy_footer()
+            case _:
+                return []
+
+    def check_unique(self, col: str, vals: list, seen_rows: set):
+        for i, val in enumerate(vals):
+            if val in seen_rows:
+                # integers come from disjoint slices of their own allocator
+                if col != "email":
+                    raise DuplicateValueError(col, val)
+                # TODO: expand this beyond only emails
+                counter = 1
+                email_split = val.split("@")
+                new_email = f"{email_split[0]}_{counter}@{email_split[1]}"
+                # don't spend forever trying to de-duplicate
+                while new_email in seen_rows:
+                    if counter > 9:
+                        self.logger.warning(f"unable to de-duplicate {val}")
+                        break
+                    counter += 1
+                    new_email = f"{email_split[0]}_{counter}@{email_split[1]}"
+                vals[i] = new_email
+            seen_rows.add(vals[i])
+
+    def seek(self, start: int, stop: int):
+        """
+        Points the allocators at the slice of IDs owned by rows [start, stop),
+        so that a worker can make any chunk of rows without overlapping the others.
+        Everything else random about the chunk is reseeded from where it starts,
+        so a chunk comes out the same no matter which process makes it, or when,
+        e.g. after --resume.
+        """
+        master = self.seeds["master"]
+        random.seed((master << 64) | start)
+        if np is not None:
+            self.rng = np.random.default_rng([start, master])
+        # IDs that cycle don't have to be disjoint, just reproducible
+        cycled = [self.random_id]
+        if self._has_float:
+            cycled += [self.float_whole_id, self.float_fractional_id]
+        for allocator in cycled:
+            allocator.seek(random.randrange(len(allocator)))
+        for allocator in self.unique_ids.values():
+            allocator.seek(start - 1, stop - start)
+        if self._has_monotonic:
+            self.monotonic_id.seek(start - 1, stop - start)
+
+    def make_rows(
+        self, start: int, stop: int, has_timestamp: bool, raw: bool = False
+    ) -> list[list]:
+        return self.make_columns(start, stop, has_timestamp, raw)
+
+    def finish_rows(
+        self,
+        cols: list[str],
+        columns: list[list],
+        seen_rows: dict[str, set],
+        raw: bool = False,
+    ) -> list[str] | list[tuple]:
+        """
+        Checks the unique columns of a chunk, each against the values seen in it
+        so far, and zips its columns into rows, either joined into value strings,
+        or as tuples of raw values if raw is set.
+        """
+        if not self.args.no_check:
+            for unique in self.unique_cols:
+                if unique in cols and unique not in self.constructed_uniques:
+                    self.check_unique(
+                        unique, columns[cols.index(unique)], seen_rows[unique]
+                    )
+        if raw:
+            rows = list(zip(*columns))
+        else:
+            rows = [",".join(row) for row in zip(*columns)]
+        if self.sort_col:
+            # kept alongside their rows, for --sort-by-pk to sort them on
+            keys = map(self.sort_key, columns[cols.index(self.sort_col)])
+            return list(zip(keys, rows))
+        return rows
+
+    def make_chunks(
+        self,
+        has_timestamp: bool,
+        raw: bool = False,
+        first_row: int = 1,
+        seen_rows: dict[str, set | BloomChecker] | None = None,
+    ):
+        """
+        Yields the rows in chunks of DEFAULT_INSERT_CHUNK_SIZE, already joined into
+        their value strings (or as tuples of raw values for a --sink), so that only
+        a single chunk is ever held in memory.
+        seen_rows is kept across chunks, so uniqueness is still checked table-wide,
+        with one checker for each unique column.
+        It can be passed in, along with the first row to make, to continue a run.
+        With --workers, chunks are made by a process pool, and yielded in order.
+        """
+        own_checker = seen_rows is None
+        if own_checker:
+            seen_rows = self.make_unique_checker()
+        chunks = self._make_chunks(has_timestamp, raw, seen_rows, first_row)
+        if self.sort_col:
+            sorter = ExternalSorter(self.args.sort_memory, self.args.sort_dir)
+            chunks = sorter.sort(chunks)
+        try:
+            yield from chunks
+        finally:
+            if own_checker:
+                self.close_unique_checker(seen_rows)
+
+    def _prepare_sort(self):
+        """
+        Finds the primary key for --sort-by-pk, and how its values compare in the
+        order they're stored in: numerically for numbers, and otherwise as strings
+        or bytes, which is the order of hex UUIDs, timestamps, and BINARY columns.
+        """
+        pk = next(
+            (
+                k
+                for k, v in self.schema.items()
+                if self.utils.strtobool(v.get("primary_key"))
+            ),
+            None,
+        )
+        if pk is None:
+            raise ValueError("--sort-by-pk needs a primary key to sort on")
+        opts = self.schema[pk]
+        # the database numbers auto_increment keys in the order rows are loaded
+        if (
+            opts.get("auto_increment")
+            or opts.get("is_empty")
+            or opts.get("order") == "monotonic"
+        ):
+            self.logger.info(
+                f"primary key `{pk}` is already in order, so --sort-by-pk has "
+                "nothing to do"
+            )
+            return
+        col_type = opts["type"]
+        epochs = col_type == "timestamp" and self.args.copy_binary
+        if "int" in col_type or epochs:
+            # binary COPY takes a timestamp as its epoch
+            self.sort_key = int
+        elif col_type in ["decimal", "double"]:
+            self.sort_key = lambda v: float(v.strip("'"))
+        else:
+            self.sort_key = lambda v: v[1:-1] if v[:1] == "'" else v
+        self.sort_col = pk
+
+    def make_unique_checker(
+        self, checkpoint: bool = False
+    ) -> dict[str, set | BloomChecker]:
+        """
+        Returns what check_unique records values in for each unique column - a set,
+        unless --unique-memory caps their size, in which case it's split between
+        them, each a Bloom filter with an exact set on disk.
+        For a checkpoint, they keep track of what it has to save.
+        """
+        checked = [c for c in self.unique_cols if c not in self.constructed_uniques]
+        if not self.args.unique_memory:
+            return {c: LoggedSet() if checkpoint else set() for c in checked}
+        return {
+            c: BloomChecker(
+                max(1, self.args.unique_memory // len(checked)),
+                self.args.num,
+                directory=self.args.unique_dir,
+                path=self.checkpoint.seen_db(c) if checkpoint else None,
+            )
+            for c in checked
+        }
+
+    @staticmethod
+    def close_unique_checker(seen_rows: dict[str, set | BloomChecker]):
+        for checker in seen_rows.values():
+            if isinstance(checker, BloomChecker):
+                checker.close()
+
+    def _make_chunks(
+        self, has_timestamp: bool, raw: bool, seen_rows, first_row: int = 1
+    ):
+        tasks = (
+            (
+                start,
+                min(start + DEFAULT_INSERT_CHUNK_SIZE, self.args.num + 1),
+                has_timestamp,
+                raw,
+            )
+            for start in range(first_row, self.args.num + 1, DEFAULT_INSERT_CHUNK_SIZE)
+        )
+        if self._is_parent:
+            # the recursive defaultdict from Generator.mysql can't be pickled
+            tbl_cols = json.loads(json.dumps(self.tbl_cols))
+            with Pool(
+                self.args.workers,
+                initializer=_init_worker,
+                initargs=(
+                    self.args,
+                    self.schema,
+                    self.tbl_name,
+                    tbl_cols,
+                    self.tbl_create,
+                    self.unique_cols,
+                    self.seeds,
+                ),
+            ) as pool:
+                for cols, columns, stats in pool.imap(_make_rows_worker, tasks):
+                    if stats:
+                        self.profiler.merge(stats)
+                    yield self.finish_rows(cols, columns, seen_rows, raw)
+        else:
+            for start, stop, _, _ in tasks:
+                self.seek(start, stop)
+                yield self.finish_rows(
+                    self.plan_cols,
+                    self.make_rows(start, stop, has_timestamp, raw),
+                    seen_rows,
+                    raw,
+                )
+
+    def run_sink(self, has_timestamp: bool) -> str:
+        """
+        Streams the rows straight into the database at --sink, rather than a file.
+        """
+        sink = make_sink(
+            self.args.sink,
+            self.tbl_name,
+            self.tbl_cols,
+            self.tbl_create,
+            self.unique_cols,
+            connections=self.args.sink_connections,
+            batch_size=self.args.batch_size,
+            tbl_indexes=self.tbl_indexes,
+        )
+        with sink:
+            for rows in self.make_chunks(has_timestamp, raw=True):
+                sink.write(rows)
+        if not self.args.quiet:
+            self.logger.info(
+                f"loaded {sink.num_rows} rows into {self.tbl_name} "
+                f"over {sink.connections} {sink.url.scheme} connection(s)"
+            )
+        return self.args.sink
+
     def run(self) -> str:
-        sql_inserts = []
         random.seed(urandom(4))
         _has_timestamp = any("timestamp" in s.values() for s in self.schema.values())
-        seen_rows = set()
+        if self.args.workers < 1:
+            raise ValueError(f"--workers must be at least 1, got {self.args.workers}")
+        if self.args.resume and not self.checkpoint:
+            raise ValueError(
+                "--resume needs the --checkpoint-dir of the interrupted run"
+            )
+        if self.checkpoint and (
+            self.args.sink
+            or self.args.output == "-"
+            or self.args.fifo
+            or self.args.split_rows
+            or self.args.split_bytes
+        ):
+            raise ValueError("--checkpoint-dir needs a single output file to resume")
+        if self.args.sort_by_pk:
+            if self.checkpoint:
+                raise ValueError(
+                    "--sort-by-pk can't be used with --checkpoint-dir, as no rows "
+                    "are written until they've all been made"
+                )
+            self._prepare_sort()
+        if self.args.sink:
+            return self.run_sink(_has_timestamp)
+        if self.args.max_packet and self.args.no_chunk:
+            raise ValueError("--max-packet can't be used with --no-chunk")
+        if self.args.copy_binary and self.args.filetype != "postgres-copy":
+            raise ValueError("--copy-binary can only be used with -f postgres-copy")
+        # COPY does its own encoding, so it takes the raw values
+        _raw = self.args.filetype == "postgres-copy"
+        splitting = self.args.split_rows or self.args.split_bytes
+        if splitting and (self.args.output == "-" or self.args.fifo):
+            raise ValueError("--split-rows and --split-bytes need a file to write to")
         # check here so we can bail early before attempting to write files if needed
         match self.args.filetype:
-            case "mysql" | "postgres":
-                try:
-                    filename = f"{PurePath(self.args.output).with_suffix('.sql')}"
-                except TypeError:
-                    try:
-                        filename = f"{PurePath(self.args.input).stem}.sql"
-                    except TypeError:
-                        filename = "gensql.sql"
-                if Path(f"schema_outputs/{filename}").exists() and not self.args.force:
-                    raise OverwriteFileError(filename) from None
+            case "mysql" | "postgres" | "postgres-copy":
+                suffix = ".pgcopy" if self.args.copy_binary else ".sql"
             case "csv":
-                try:
-                    filename = f"{PurePath(self.args.output).with_suffix('.csv')}"
-                except TypeError:
-                    try:
-                        filename = f"{PurePath(self.args.input).stem}.csv"
-                    except TypeError:
-                        filename = "gensql.csv"
+                suffix = ".csv"
                 if any(k for k, v in self.schema.items() if "binary" in v.values()):
                     raise BinaryTypeInCSVError() from None
-                if Path(f"schema_outputs/{filename}").exists() and not self.args.force:
-                    raise OverwriteFileError(filename) from None
             case _:
                 raise ValueError(f"{self.args.filetype} is not a valid output format")
-        for i in range(1, self.args.num + 1):
-            row = self.make_row(i, _has_timestamp)
-            if not self.args.no_check:
-                for unique in self.unique_cols:
-                    if row[unique] in seen_rows:
-                        # TODO: expand this beyond only emails
-                        counter = 1
-                        email_split = row[unique].split("@")
-                        new_email = f"{email_split[0]}_{counter}@{email_split[1]}"
-                        # don't spend forever trying to de-duplicate
-                        while new_email in seen_rows:
-                            if counter > 9:
-                                self.logger.warning(
-                                    f"unable to de-duplicate {row[unique]}"
-                                )
+        to_stdout = self.args.output == "-"
+        # a stream only carries rows, so the DDL always goes to its own file
+        streaming = to_stdout or bool(self.args.fifo)
+        # with rows on stdout, anything else printed has to go elsewhere
+        info = sys.stderr if to_stdout else sys.stdout
+        try:
+            filename = f"{PurePath(self.args.output).with_suffix(suffix)}"
+        except (TypeError, ValueError):
+            try:
+                filename = f"{PurePath(self.args.input).stem}{suffix}"
+            except TypeError:
+                filename = f"gensql{suffix}"
+        if self.args.compress:
+            filename = f"{filename}{SUFFIXES[self.args.compress]}"
+        if self.args.fifo:
+            filename = self.args.fifo
+        elif to_stdout:
+            filename = "-"
+        elif splitting:
+            return self.run_split(filename, _has_timestamp, _raw)
+        elif (
+            Path(f"{self.output_dir}/{filename}").exists()
+            and not self.args.force
+            and not self.resume_state
+        ):
+            raise OverwriteFileError(filename) from None
+        if self.checkpoint and not self.resume_state:
+            # a stale checkpoint must not be resumed into this run's output
+            self.checkpoint.clear()
+        mode = "w" if self.args.force else "x"
+        made_fifo = False
+        try:
+            # like a CSV, a COPY file can't hold the DDL, so it gets its own file
+            separate_ddl = streaming or self.args.filetype in ["csv", "postgres-copy"]
+            if separate_ddl and not self.resume_state:
+                with open(
+                    f"{self.output_dir}/tbl_{self.tbl_name}_create.sql", mode
+                ) as ft:
+                    ft.writelines(self.tbl_create)
+                self.outputs[ft.name] = None
+            # only a mysql .sql file can hold them after its rows
+            if (streaming or "sql" not in self.args.filetype) and not self.resume_state:
+                indexes = self.write_indexes(mode)
+                if indexes and self.args.filetype != "csv" and not self.args.quiet:
+                    self.logger.info(
+                        f"add the unique keys with {self.output_dir}/{indexes} "
+                        "once the rows are loaded"
+                    )
+            if self.args.fifo:
+                made_fifo = self.make_fifo(self.args.fifo)
+                # opening a FIFO blocks until there's a reader, so say how to start one
+                self.print_load_help(self.args.fifo, info)
+                out = self.open_output(self.args.fifo, "w")
+            elif to_stdout:
+                out = self.open_output("-", mode)
+            elif self.resume_state:
+                out = self.reopen_output(
+                    f"{self.output_dir}/{filename}", self.resume_state["offset"]
+                )
+            else:
+                out = self.open_output(f"{self.output_dir}/{filename}", mode)
+            with out as f:
+                if self.profiler:
+                    f = self.profiler.wrap_file(f)
+                if not self.resume_state:
+                    if "sql" in self.args.filetype and not streaming:
+                        f.writelines(self.tbl_create)
+                    f.writelines(self.make_header())
+                self.write_chunks(f, _has_timestamp, _raw)
+                f.writelines(self.make_footer())
+                if "sql" in self.args.filetype and not streaming:
+                    # after the COMMIT, so they're built from the loaded rows
+                    f.writelines(self.tbl_indexes)
+                f.flush()
+            if self.checkpoint:
+                self.checkpoint.clear()
+            if not streaming:
+                self.outputs[f"{self.output_dir}/{filename}"] = None
+            if not self.args.fifo:
+                # the rows are piped into the client, so it has to read them itself
+                self.print_load_help(
+                    "/dev/stdin" if to_stdout else filename, info, local=to_stdout
+                )
+        except FileExistsError as e:
+            # with -o - or --fifo, it's the DDL or index file that already exists
+            raise OverwriteFileError(e.filename or filename) from None
+        except PermissionError:
+            raise OutputFilePermissionError(filename) from None
+        except BrokenPipeError:
+            raise SystemExit(f"FATAL: the reader of {filename} closed it early")
+        finally:
+            if made_fifo:
+                os.unlink(self.args.fifo)
+        return filename if streaming else f"{self.output_dir}/{filename}"
+
+    def write_chunks(self, f, has_timestamp: bool, raw: bool):
+        """
+        Writes every chunk of rows to f. With --checkpoint-dir, a checkpoint is
+        saved every --checkpoint-every rows (rounded up to whole chunks), and with
+        --resume, the rows start from the last one.
+        """
+        if not self.checkpoint:
+            for vals in self.make_chunks(has_timestamp, raw):
+                f.writelines(self.make_chunk(vals))
+            return
+        next_row = 1
+        seen_rows = self.make_unique_checker(checkpoint=True)
+        try:
+            if self.resume_state:
+                next_row = self.resume_state["next_row"]
+                self._packet_size = self.resume_state["packet_size"]
+                seen_rows = self.checkpoint.restore_seen(self.resume_state, seen_rows)
+                if not self.args.quiet:
+                    self.logger.info(f"resuming at row {next_row} of {self.args.num}")
+            last_saved = next_row
+            for vals in self.make_chunks(has_timestamp, raw, next_row, seen_rows):
+                f.writelines(self.make_chunk(vals))
+                next_row += len(vals)
+                if (
+                    next_row - last_saved >= self.args.checkpoint_every
+                    and next_row <= self.args.num
+                ):
+                    self.save_checkpoint(f, next_row, seen_rows)
+                    last_saved = next_row
+        finally:
+            self.close_unique_checker(seen_rows)
+
+    def save_checkpoint(
+        self, f, next_row: int, seen_rows: dict[str, set | BloomChecker]
+    ):
+        # the output is synced first, so a checkpoint never points past its end
+        f.flush()
+        # i.e. the file beneath a CompressedWriter
+        out = getattr(f, "file", f)
+        os.fsync(out.fileno())
+        self.checkpoint.save(
+            self.args, self.seeds, next_row, out.tell(), self._packet_size, seen_rows
+        )
+
+    def run_split(self, filename: str, has_timestamp: bool, raw: bool) -> str:
+        """
+        Writes the rows into numbered part files of at most --split-rows rows, and
+        about --split-bytes (uncompressed) bytes, judged by the formatted size of
+        each row. Every part has its own header and footer, without table locks,
+        so the parts can be loaded independently and concurrently. Alongside them
+        go the DDL, a manifest of each part's rows, size, and SHA-256, and a
+        script to load them. Returns the path of the manifest.
+        """
+        split_rows = self.args.split_rows or float("inf")
+        split_bytes = self.args.split_bytes or float("inf")
+        if split_rows < 1:
+            raise ValueError(f"--split-rows must be at least 1, got {split_rows}")
+        mode = "w" if self.args.force else "x"
+        base = PurePath(filename.removesuffix(SUFFIXES.get(self.args.compress, "")))
+        suffix = f"{base.suffix}{SUFFIXES.get(self.args.compress, '')}"
+        ddl = f"tbl_{self.tbl_name}_create.sql"
+        parts = []
+        f = None
+
+        def open_part():
+            nonlocal f
+            name = f"{base.stem}.part{len(parts) + 1:04d}{suffix}"
+            hashed = HashingWriter(f"{self.output_dir}/{name}", mode)
+            if self.args.compress:
+                f = CompressedWriter(hashed, mode, self.args.compress)
+            else:
+                f = hashed
+            if self.profiler:
+                f = self.profiler.wrap_file(f)
+            parts.append({"file": name, "rows": 0, "bytes": 0, "sha256": None})
+            f.writelines(self.make_header(lock=False))
+            return hashed
+
+        def close_part(hashed: HashingWriter):
+            nonlocal f
+            f.writelines(self.make_footer(lock=False))
+            f.close()
+            hashed.close()
+            parts[-1]["bytes"] = hashed.size
+            parts[-1]["sha256"] = hashed.sha256.hexdigest()
+            self.outputs[hashed.file.name] = parts[-1]["sha256"]
+            f = None
+
+        try:
+            with open(f"{self.output_dir}/{ddl}", mode) as ft:
+                ft.writelines(self.tbl_create)
+            self.outputs[ft.name] = None
+            indexes = self.write_indexes(mode)
+            part_bytes = 0
+            for vals in self.make_chunks(has_timestamp, raw):
+                i = 0
+                while i < len(vals):
+                    if f is None:
+                        hashed = open_part()
+                        part_bytes = 0
+                    num = min(len(vals) - i, split_rows - parts[-1]["rows"])
+                    full = parts[-1]["rows"] + num >= split_rows
+                    if self.args.split_bytes:
+                        # always take at least one row, so a part is never empty
+                        for n, row in enumerate(vals[i : i + num]):
+                            part_bytes += self._row_size(row)
+                            if part_bytes >= split_bytes:
+                                num = n + 1
+                                full = True
                                 break
-                            counter += 1
-                            new_email = f"{email_split[0]}_{counter}@{email_split[1]}"
-                        row[unique] = new_email
-                        seen_rows.add(row[unique])
-                    else:
-                        seen_rows.add(row[unique])
-            sql_inserts.append(row)
-        if self.city_country_swapped:
-            for insert in sql_inserts:
-                insert["city"], insert["country"] = insert["country"], insert["city"]
-        vals = [",".join(str(v) for v in d.values()) for d in sql_inserts]
+                    f.writelines(self.make_chunk(vals[i : i + num]))
+                    parts[-1]["rows"] += num
+                    i += num
+                    if full:
+                        close_part(hashed)
+            if f is not None:
+                close_part(hashed)
+            manifest = f"{base.stem}.manifest.json"
+            with open(f"{self.output_dir}/{manifest}", mode) as fm:
+                json.dump(
+                    {
+                        "table": self.tbl_name,
+                        "filetype": self.args.filetype,
+                        "compress": self.args.compress,
+                        "ddl": ddl,
+                        "indexes": indexes,
+                        "rows": sum(part["rows"] for part in parts),
+                        "parts": parts,
+                    },
+                    fm,
+                    indent=4,
+                )
+                fm.write("\n")
+            self.outputs[fm.name] = None
+            script = f"{base.stem}.load.sh"
+            with open(f"{self.output_dir}/{script}", mode) as fs:
+                fs.write(
+                    self.make_load_script(
+                        [part["file"] for part in parts], ddl, script, indexes
+                    )
+                )
+            os.chmod(f"{self.output_dir}/{script}", 0o755)
+            self.outputs[fs.name] = None
+        except FileExistsError as e:
+            raise OverwriteFileError(e.filename) from None
+        except PermissionError as e:
+            raise OutputFilePermissionError(e.filename) from None
+        if not self.args.quiet:
+            self.logger.info(
+                f"wrote {len(parts)} parts, load them with {self.output_dir}/{script}"
+            )
+        return f"{self.output_dir}/{manifest}"
+
+    def write_indexes(self, mode: str) -> str | None:
+        """
+        Writes the unique keys left out of the table by --defer-indexes to their
+        own file, next to the DDL, and returns its name if there are any.
+        """
+        if not self.tbl_indexes:
+            return None
+        indexes = f"tbl_{self.tbl_name}_indexes.sql"
+        with open(f"{self.output_dir}/{indexes}", mode) as fi:
+            fi.write(self.tbl_indexes)
+        self.outputs[fi.name] = None
+        return indexes
+
+    @staticmethod
+    def _row_size(row: str | tuple) -> int:
+        """
+        The approximate size of a row once it's written, plus its separators.
+        COPY's raw rows are only encoded later, so theirs is estimated.
+        """
+        if isinstance(row, str):
+            return len(row) + 4
+        return sum(
+            len(v) if isinstance(v, (str, bytes)) else 8 for v in row if v is not None
+        ) + 4 * len(row)
+
+    def make_load_data_stmt(self, filename: str, local: bool = False) -> str:
+        return (
+            f"LOAD DATA {'LOCAL ' if local else ''}INFILE '{filename}' "
+            f"INTO TABLE `{self.tbl_name}` "
+            "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY \"'\" IGNORE 1 LINES "
+            f"(`{'`, `'.join(self.tbl_cols)}`);"
+        )
+
+    def make_load_script(
+        self, parts: list[str], ddl: str, script: str, indexes: str | None = None
+    ) -> str:
+        """
+        Makes a bash script that loads the parts of a split output, each with its
+        own client reading the part from stdin, and up to $JOBS at once. With
+        --defer-indexes, the unique keys are added once every part has loaded.
+        """
+        reader = {"gzip": "gzip -dc", "xz": "xz -dc"}.get(self.args.compress, "cat")
         match self.args.filetype:
-            case "mysql":
-                lines = self.make_sql_rows(vals, "mysql")
-            case "postgres":
-                lines = self.make_sql_rows(vals, "postgres")
             case "csv":
-                lines = self.make_csv_rows(vals)
-            # TODO: don't double this up
+                stmts = ["SET @@time_zone = '+00:00'"]
+                if not self.args.no_check:
+                    stmts.append("SET @@unique_checks = 0")
+                stmts.append(self.make_load_data_stmt("/dev/stdin", local=True))
+                client = (
+                    f"mysql --local-infile=1 \"$@\" -e {shlex.quote('; '.join(stmts))}"
+                )
+            case "mysql":
+                client = 'mysql "$@"'
+            case _ if self.args.copy_binary:
+                copy_stmt = (
+                    f"\\copy {self.tbl_name} ({', '.join(self.tbl_cols)}) "
+                    "FROM pstdin WITH (FORMAT binary)"
+                )
+                client = f'psql -v ON_ERROR_STOP=1 "$@" -c {shlex.quote(copy_stmt)}'
             case _:
-                raise ValueError(f"{self.args.filetype} is not a valid output format")
+                client = 'psql -v ON_ERROR_STOP=1 -q "$@" -f -'
+        part_list = "".join(f"    {shlex.quote(part)} \\\n" for part in parts)
+        add_indexes = ""
+        if indexes:
+            index_client = 'mysql "$@"'
+            if "postgres" in self.args.filetype:
+                index_client = 'psql -v ON_ERROR_STOP=1 -q "$@" -f -'
+            add_indexes = (
+                "\n"
+                "# the unique keys are only added once every part is in\n"
+                f"{index_client} < {shlex.quote(indexes)}\n"
+            )
+        return (
+            "#!/usr/bin/env bash\n"
+            f"# Loads the {len(parts)} parts of {self.tbl_name}, with up to $JOBS "
+            "(default 4) at once.\n"
+            f"# Create the table with {ddl} first. Any arguments are passed on to\n"
+            f"# every client, e.g. JOBS=8 ./{script} -h $HOST -u $USER $SCHEMA\n"
+            "set -uo pipefail\n"
+            'cd "$(dirname "$0")"\n'
+            "\n"
+            "load_part() {\n"
+            "    set -o pipefail\n"
+            '    local part="$1"\n'
+            "    shift\n"
+            f'    {reader} "$part" | {client}\n'
+            "}\n"
+            "export -f load_part\n"
+            "\n"
+            "printf '%s\\0' \\\n"
+            f"{part_list}"
+            '    | xargs -0 -I {} -P "${JOBS:-4}" bash -c \'load_part "$@"\' _ {} "$@"'
+            f"{' || exit' if indexes else ''}\n"
+            f"{add_indexes}"
+        )
+
+    def make_fifo(self, path: str) -> bool:
+        """
+        Makes a named pipe at path, returning whether one had to be made.
+        An existing FIFO is reused, but nothing else is replaced.
+        """
         try:
-            with open(
-                f"schema_outputs/{filename}", f"{'w' if self.args.force else 'x'}"
-            ) as f:
-                if "sql" in self.args.filetype:
-                    f.writelines(self.tbl_create)
-                if self.args.filetype == "csv":
-                    with open(
-                        f"schema_outputs/tbl_{self.tbl_name}_create.sql",
-                        f"{'w' if self.args.force else 'x'}",
-                    ) as ft:
-                        ft.writelines(self.tbl_create)
-                f.writelines(lines)
-                if not self.args.quiet and self.args.filetype == "csv":
-                    self.logger.info(
-                        "use the following statements to load your data into MySQL"
-                    )
-                    print("SET @@time_zone = '+00:00';")
-                    if not self.args.no_check:
-                        print("SET @@unique_checks = 0;")
-                    csv_load_stmt = (
-                        f"LOAD DATA INFILE '{filename}' INTO TABLE `{self.tbl_name}` "
-                        "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY \"'\" IGNORE 1 LINES "
-                        f"(`{'`, `'.join(self.tbl_cols)}`);"
-                    )
-                    print(csv_load_stmt)
-                    print("SET @@unique_checks = 1;")
-                    print("SET @@time_zone = (SELECT @@GLOBAL.time_zone);")
+            os.mkfifo(path, 0o644)
+            return True
         except FileExistsError:
-            raise OverwriteFileError(filename) from None
-        except PermissionError:
-            raise OutputFilePermissionError(filename) from None
-        return f"schema_outputs/{filename}"
+            if stat.S_ISFIFO(os.stat(path).st_mode):
+                return False
+            raise OverwriteFileError(path) from None
+
+    def open_output(self, path: str, mode: str):
+        """
+        Opens the output as a context manager, which is one of: a plain file,
+        stdout if path is -, or either of those compressed with --compress.
+        stdout is left open when done.
+        """
+        binary = self.args.copy_binary or self.args.compress
+        if path == "-":
+            stream = sys.stdout.buffer if binary else sys.stdout
+            if self.args.compress:
+                return CompressedWriter(stream, mode, self.args.compress)
+            return nullcontext(stream)
+        if self.args.compress:
+            return CompressedWriter(path, mode, self.args.compress)
+        return open(path, f"{mode}{'b' if binary else ''}")
+
+    @contextmanager
+    def reopen_output(self, path: str, offset: int):
+        """
+        Opens the output of an interrupted run to append to, after cutting off
+        anything written past offset, i.e. since its last checkpoint.
+        """
+        binary = self.args.copy_binary or self.args.compress
+        try:
+            size = os.path.getsize(path)
+        except FileNotFoundError:
+            raise CheckpointError(self.checkpoint.directory, f"{path} is missing")
+        if size < offset:
+            raise CheckpointError(
+                self.checkpoint.directory,
+                f"{path} is {size} bytes, but was {offset} at the checkpoint",
+            )
+        with open(path, "r+b" if binary else "r+") as f:
+            f.truncate(offset)
+            f.seek(offset)
+            if self.args.compress:
+                # compressed blocks are independent, so new ones can just follow
+                with CompressedWriter(f, method=self.args.compress) as cf:
+                    yield cf
+            else:
+                yield f
+
+    def print_load_help(self, filename: str, file=sys.stdout, local: bool = False):
+        if self.args.quiet:
+            return
+        if self.args.filetype == "csv":
+            self.logger.info(
+                "use the following statements to load your data into MySQL"
+                f"{', with mysql --local-infile=1' if local else ''}"
+            )
+            print("SET @@time_zone = '+00:00';", file=file)
+            if not self.args.no_check:
+                print("SET @@unique_checks = 0;", file=file)
+            print(self.make_load_data_stmt(filename, local), file=file)
+            print("SET @@unique_checks = 1;", file=file)
+            print("SET @@time_zone = (SELECT @@GLOBAL.time_zone);", file=file)
+            if self.tbl_indexes:
+                print(self.tbl_indexes, end="", file=file)
+        elif self.args.copy_binary:
+            self.logger.info(
+                "use the following statement to load your data into Postgres"
+            )
+            print(
+                f"\\copy {self.tbl_name} ({', '.join(self.tbl_cols)}) "
+                f"FROM '{filename}' WITH (FORMAT binary)",
+                file=file,
+            )
+            if self.tbl_indexes:
+                print(self.tbl_indexes, end="", file=file)
+        elif self.args.fifo:
+            self.logger.info(
+                f"waiting for a reader of {filename}, e.g. "
+                f"{'psql -f' if 'postgres' in self.args.filetype else 'mysql <'} {filename}"
+            )
@@ -0,0 +1,91 @@
+import heapq
+from operator import itemgetter
+import pickle
+import sys
+import tempfile
+
+from utilities.constants import DEFAULT_INSERT_CHUNK_SIZE
+
+# (key, row) pairs pickled to a run at a time, and so read back at a time
+_RUN_BLOCK_ROWS = 4096
+
+
+def _row_size(pair: tuple) -> int:
+    key, row = pair
+    size = sys.getsizeof(pair) + sys.getsizeof(key) + sys.getsizeof(row)
+    if isinstance(row, tuple):
+        size += sum(map(sys.getsizeof, row))
+    # and its slot in the list
+    return size + 8
+
+
+class ExternalSorter:
+    """
+    Sorts chunks of (key, row) pairs by key for --sort-by-pk, with bounded memory.
+    Pairs are gathered until they'd take more than memory bytes, then sorted and
+    spilled to a temporary file as a run. Once every chunk is in, the runs are
+    merged, and the rows are yielded in sorted chunks of DEFAULT_INSERT_CHUNK_SIZE.
+    If everything fits in memory, nothing is spilled.
+    """
+
+    def __init__(self, memory: int, directory: str | None = None):
+        self.memory = memory
+        self.directory = directory
+        self.runs = []
+        self.num_spilled = 0
+
+    def _spill(self, pairs: list):
+        pairs.sort(key=itemgetter(0))
+        run = tempfile.TemporaryFile(dir=self.directory)
+        for i in range(0, len(pairs), _RUN_BLOCK_ROWS):
+            pickle.dump(pairs[i : i + _RUN_BLOCK_ROWS], run, pickle.HIGHEST_PROTOCOL)
+        run.seek(0)
+        self.runs.append(run)
+        self.num_spilled += len(pairs)
+
+    @staticmethod
+    def _read_run(run):
+        while True:
+            try:
+                yield from pickle.load(run)
+            except EOFError:
+                return
+
+    def sort(self, chunks):
+        """
+        Takes an iterable of chunks of (key, row) pairs, and yields chunks of rows,
+        sorted by key across all of the chunks.
+        """
+        pairs = []
+        max_pairs = None
+        try:
+            for chunk in chunks:
+                if max_pairs is None and chunk:
+                    # size up the rows once, rather than measuring every one
+                    avg = sum(map(_row_size, chunk)) / len(chunk)
+                    max_pairs = max(int(self.memory / avg), DEFAULT_INSERT_CHUNK_SIZE)
+                pairs.extend(chunk)
+                if max_pairs and len(pairs) >= max_pairs:
+                    self._spill(pairs)
+                    pairs = []
+            pairs.sort(key=itemgetter(0))
+            if self.runs:
+                runs = [self._read_run(run) for run in self.runs]
+                merged = heapq.merge(*runs, iter(pairs), key=itemgetter(0))
+            else:
+                merged = iter(pairs)
+            chunk = []
+            for _, row in merged:
+                chunk.append(row)
+                if len(chunk) == DEFAULT_INSERT_CHUNK_SIZE:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+        finally:
+            self.close()
+
+    def close(self):
+        for run in self.runs:
+            run.close()
+        self.runs = []
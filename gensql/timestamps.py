@@ -0,0 +1,138 @@
+from array import array
+from datetime import date, datetime, timedelta
+from functools import cache
+import mmap
+import random
+import struct
+import sys
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_DAY = 86400
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_ORDINAL = _EPOCH.toordinal()
+_SECOND = timedelta(seconds=1)
+# epochs drawn at a time when writing a cache
+_CACHE_CHUNK = 1024**2
+# magic, then the range the cached epochs were drawn from
+_CACHE_HEADER = struct.Struct("<8sqq")
+_CACHE_MAGIC = b"GSQLDATE"
+
+
+def to_epoch(dt: datetime) -> int:
+    """
+    Seconds since 1970-01-01 of a naive datetime, which is taken to be in UTC.
+    """
+    return (dt - _EPOCH) // _SECOND
+
+
+@cache
+def _clock() -> list[str]:
+    """
+    'HH:MM:SS' of every second of a day, built once per process.
+    """
+    minutes = [f"{h:02d}:{m:02d}:" for h in range(24) for m in range(60)]
+    seconds = [f"{s:02d}" for s in range(60)]
+    return [m + s for m in minutes for s in seconds]
+
+
+class Timestamps:
+    """
+    Draws timestamps as integer seconds since the epoch, in bulk, and formats
+    them as 'YYYY-MM-DD HH:MM:SS' with two lookups each: the date of their day,
+    from a table of every day in the range, and their time of day, from a table
+    of every second in a day.
+
+    Timestamps are drawn uniformly from [start, end), or from a cache made by
+    write_cache() (e.g. with --generate-dates), which is memory-mapped rather
+    than read in.
+    """
+
+    def __init__(self, start: datetime, end: datetime, cache: str | None = None):
+        self.start = to_epoch(start)
+        self.end = to_epoch(end)
+        self.cache = None
+        if cache:
+            with open(cache, "rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, self.start, self.end = _CACHE_HEADER.unpack_from(self._mmap)
+            if magic != _CACHE_MAGIC:
+                raise ValueError(f"{cache} is not a dates cache")
+            if np is not None:
+                self.cache = np.frombuffer(
+                    self._mmap, dtype="<i8", offset=_CACHE_HEADER.size
+                )
+            else:
+                self.cache = memoryview(self._mmap)[_CACHE_HEADER.size :].cast("q")
+        self.first_day = self.start // _DAY
+        self.days = [
+            f"{date.fromordinal(_EPOCH_ORDINAL + day).isoformat()} "
+            for day in range(self.first_day, (self.end - 1) // _DAY + 1)
+        ]
+        self.clock = _clock()
+
+    def draw(self, num: int, rng=None):
+        """
+        Returns num epochs, as a NumPy array if a NumPy Generator is given to
+        draw them with, otherwise as a list drawn with the random module.
+        """
+        if self.cache is not None:
+            if rng is not None:
+                return self.cache[rng.integers(0, len(self.cache), num)]
+            return random.choices(self.cache, k=num)
+        if rng is not None:
+            return rng.integers(self.start, self.end, num)
+        return random.choices(range(self.start, self.end), k=num)
+
+    def monotonic(self, start: int, stop: int, num: int, rng=None):
+        """
+        Returns the epochs of rows [start, stop) of num, which rise with the row:
+        the range is split into num equal steps, and each row falls at a random
+        point in its own step.
+        """
+        step = (self.end - self.start) / num
+        if rng is not None:
+            steps = np.arange(start - 1, stop - 1) + rng.random(stop - start)
+            return (self.start + steps * step).astype(np.int64)
+        rand, first = random.random, self.start
+        return [first + int((i + rand()) * step) for i in range(start - 1, stop - 1)]
+
+    def after(self, epochs, rng=None):
+        """
+        Returns an epoch at or after each of epochs, and before the end of the
+        range, e.g. for an updated_at that can't precede its created_at.
+        """
+        if rng is not None:
+            epochs = np.asarray(epochs)
+            offsets = rng.random(len(epochs)) * (self.end - epochs)
+            return epochs + offsets.astype(np.int64)
+        rand, end = random.random, self.end
+        return [t + int(rand() * (end - t)) for t in epochs]
+
+    def format(self, epochs) -> list[str]:
+        days, clock = self.days, self.clock
+        if np is not None and isinstance(epochs, np.ndarray):
+            day_idx, secs = np.divmod(epochs - self.first_day * _DAY, _DAY)
+            return [days[d] + clock[s] for d, s in zip(day_idx.tolist(), secs.tolist())]
+        first = self.first_day * _DAY
+        return [days[(t - first) // _DAY] + clock[t % _DAY] for t in epochs]
+
+    def write_cache(self, f, num: int):
+        """
+        Draws num epochs and writes them to the binary file f, as a cache for
+        later runs: a header, then the epochs as little-endian int64s.
+        """
+        f.write(_CACHE_HEADER.pack(_CACHE_MAGIC, self.start, self.end))
+        rng = np.random.default_rng() if np is not None else None
+        for done in range(0, num, _CACHE_CHUNK):
+            epochs = self.draw(min(_CACHE_CHUNK, num - done), rng)
+            if rng is not None:
+                f.write(epochs.astype("<i8").tobytes())
+                continue
+            epochs = array("q", epochs)
+            if sys.byteorder == "big":
+                epochs.byteswap()
+            f.write(epochs.tobytes())
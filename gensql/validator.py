@@ -2,7 +2,13 @@ import json
 from pathlib import PurePath
 
 from exceptions.exceptions import SchemaValidationError
-from utilities.constants import ALLOWED_COLS, ALLOWED_UNIQUES, MYSQL_INT_MIN_MAX
+from gensql.distributions import MAX_SKEWED_VALUES, SKEW_OPTIONS, parse_distribution
+from utilities.constants import (
+    ALLOWED_COLS,
+    ALLOWED_SKEWED,
+    ALLOWED_UNIQUES,
+    MYSQL_INT_MIN_MAX,
+)
 from utilities import utilities
 
 
@@ -95,15 +101,20 @@ class Validator:
         errors["schema"] = schema
         for k, v in schema.items():
             col_type = v.get("type")
+            col_after = v.get("after")
             col_width = v.get("width")
             col_nullable = self.utils.strtobool(v.get("nullable"))
             col_autoinc = self.utils.strtobool(v.get("auto_increment"))
             col_default = v.get("default")
+            col_distinct = v.get("distinct")
+            col_distribution = v.get("distribution")
             col_invisible = self.utils.strtobool(v.get("invisible"))
             col_json_num_arr = v.get("is_numeric_array")
             col_max_length = v.get("max_length")
+            col_order = v.get("order")
             col_pk = self.utils.strtobool(v.get("primary_key"))
             col_unique = self.utils.strtobool(v.get("unique"))
+            col_uuid_version = v.get("uuid_version")
             if "int" in col_type:
                 if "unsigned" in col_type:
                     col_min_val = 0
@@ -193,6 +204,110 @@ class Validator:
                     v,
                     f"is_numeric_array is not a valid option for column `{k}` of type `{col_type}`",
                 )
+            if col_uuid_version and col_uuid_version not in ["1", "4", "7"]:
+                _add_error(
+                    errors,
+                    (k, "uuid_version"),
+                    v,
+                    f"uuid_version must be one of 1, 4, or 7 (got {col_uuid_version})",
+                )
+            if col_order and col_order not in ["monotonic", "random"]:
+                _add_error(
+                    errors,
+                    (k, "order"),
+                    v,
+                    f"order must be one of monotonic or random (got {col_order})",
+                )
+            elif col_order and col_type != "timestamp" and "int" not in col_type:
+                _add_error(
+                    errors,
+                    (k, "order"),
+                    v,
+                    f"order is not a valid option for column `{k}` of type `{col_type}`",
+                )
+            if col_after:
+                # follow the chain of columns that are after each other, to catch loops
+                chain = [k]
+                while col_after and col_after not in chain:
+                    chain.append(col_after)
+                    col_after = schema.get(col_after, {}).get("after")
+                if col_type != "timestamp":
+                    _add_error(
+                        errors,
+                        (k, "after"),
+                        v,
+                        f"after is not a valid option for column `{k}` of type `{col_type}`",
+                    )
+                elif schema.get(v["after"], {}).get("type") != "timestamp":
+                    _add_error(
+                        errors,
+                        (k, "after"),
+                        v,
+                        f"column `{k}` can only be after another timestamp column (got `{v['after']}`)",
+                    )
+                elif col_after:
+                    _add_error(
+                        errors,
+                        (k, "after"),
+                        v,
+                        f"column `{k}` can't be after itself (via {' -> '.join(chain + [col_after])})",
+                    )
+                elif col_order == "monotonic":
+                    _add_error(
+                        errors,
+                        (k, "after"),
+                        v,
+                        f"column `{k}` can't be both monotonic and after `{v['after']}`",
+                    )
+            for opt in sorted(SKEW_OPTIONS & set(v)):
+                if k not in ALLOWED_SKEWED and "int" not in col_type:
+                    _add_error(
+                        errors,
+                        (k, opt),
+                        v,
+                        f"{opt} is not a valid option for column `{k}` of type `{col_type}`",
+                    )
+                elif col_unique or col_autoinc or col_order == "monotonic":
+                    _add_error(
+                        errors,
+                        (k, opt),
+                        v,
+                        f"column `{k}` can't have a {opt} and be unique, auto_increment, or monotonic",
+                    )
+                elif k == "country" and SKEW_OPTIONS & set(schema.get("city", {})):
+                    _add_error(
+                        errors,
+                        (k, opt),
+                        v,
+                        f"city and country are drawn together, so only one of them can have a {opt}",
+                    )
+            if col_distribution:
+                try:
+                    kind, _ = parse_distribution(col_distribution)
+                except ValueError as e:
+                    _add_error(errors, (k, "distribution"), v, str(e))
+                else:
+                    num_values = self.args.num
+                    if col_distinct and col_distinct.isdigit():
+                        num_values = int(col_distinct)
+                    if (
+                        kind != "uniform"
+                        and "int" in col_type
+                        and num_values > MAX_SKEWED_VALUES
+                    ):
+                        _add_error(
+                            errors,
+                            (k, "distribution"),
+                            v,
+                            f"column `{k}` can only have a {kind} distribution over at most {MAX_SKEWED_VALUES} values - set distinct",
+                        )
+            if col_distinct and (not col_distinct.isdigit() or not int(col_distinct)):
+                _add_error(
+                    errors,
+                    (k, "distinct"),
+                    v,
+                    f"distinct must be a positive integer (got {col_distinct})",
+                )
             if col_nullable and col_pk:
                 _add_error(
                     errors,
@@ -0,0 +1,141 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import gzip
+import hashlib
+import lzma
+import os
+from typing import BinaryIO
+
+from utilities.constants import DEFAULT_COMPRESS_BLOCK_SIZE
+
+# every block is compressed on its own into a complete gzip member / xz stream,
+# and both formats define a concatenation of those as one valid file
+COMPRESSORS = {
+    "gzip": partial(gzip.compress, compresslevel=6, mtime=0),
+    "xz": partial(lzma.compress, preset=6),
+}
+SUFFIXES = {"gzip": ".gz", "xz": ".xz"}
+
+
+class CompressedWriter:
+    """
+    A write-only file that compresses its output in independent blocks on a pool
+    of threads, as zlib and lzma release the GIL while they work. Blocks are
+    written in order as they finish, and at most two per thread are in flight,
+    so memory use depends on the block size, not on the size of the output.
+    Accepts both str (encoded as UTF-8) and bytes. path may also be an already
+    open binary file, e.g. stdout, which is flushed but left open when done.
+    """
+
+    def __init__(
+        self,
+        path: str | BinaryIO,
+        mode: str = "x",
+        method: str = "gzip",
+        block_size: int = DEFAULT_COMPRESS_BLOCK_SIZE,
+        threads: int | None = None,
+    ):
+        try:
+            self.compress = COMPRESSORS[method]
+        except KeyError:
+            raise ValueError(f"{method} is not a supported compression method")
+        self.block_size = block_size
+        self.threads = threads or os.cpu_count() or 1
+        self._owns_file = not hasattr(path, "write")
+        self.file = open(path, f"{mode}b") if self._owns_file else path
+        self.closed = False
+        self.pool = ThreadPoolExecutor(self.threads)
+        self.pending = deque()
+        self.buffer = []
+        self.buffered = 0
+
+    def _submit(self):
+        block = b"".join(self.buffer)
+        self.buffer = []
+        self.buffered = 0
+        self.pending.append(self.pool.submit(self.compress, block))
+        while len(self.pending) > 2 * self.threads:
+            self.file.write(self.pending.popleft().result())
+
+    def write(self, data: str | bytes):
+        if isinstance(data, str):
+            data = data.encode()
+        self.buffer.append(data)
+        self.buffered += len(data)
+        if self.buffered >= self.block_size:
+            self._submit()
+
+    def writelines(self, lines: list[str] | list[bytes]):
+        if lines:
+            self.write(("" if isinstance(lines[0], str) else b"").join(lines))
+
+    def flush(self):
+        """
+        Compresses and writes everything buffered so far. This ends the current
+        block early, so it's best left to close().
+        """
+        if self.buffer:
+            self._submit()
+        while self.pending:
+            self.file.write(self.pending.popleft().result())
+        self.file.flush()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.flush()
+        finally:
+            self.pool.shutdown(cancel_futures=True)
+            if self._owns_file:
+                self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            # don't spend time compressing output that's already broken
+            self.buffer = []
+            self.pending.clear()
+        self.close()
+        return False
+
+
+class HashingWriter:
+    """
+    A write-only binary file that keeps count of the bytes written to it, and
+    their SHA-256, e.g. for the manifest of split output. Accepts both str
+    (encoded as UTF-8) and bytes, so it can also sit beneath a CompressedWriter.
+    """
+
+    def __init__(self, path: str, mode: str = "x"):
+        self.file = open(path, f"{mode}b")
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data: str | bytes):
+        if isinstance(data, str):
+            data = data.encode()
+        self.sha256.update(data)
+        self.size += len(data)
+        self.file.write(data)
+
+    def writelines(self, lines: list[str] | list[bytes]):
+        if lines:
+            self.write(("" if isinstance(lines[0], str) else b"").join(lines))
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
@@ -20,12 +20,16 @@ uint32_t *fill_array_range(uint32_t start, uint32_t end) {
     if (!arr) {
         return NULL;
     }
-    for (uint32_t i = start; i <= end; i++) {
-        arr[i] = i;
+    for (uint32_t i = start; i < end; i++) {
+        arr[i - start] = i;
     }
     return arr;
 }
 
+void free_array(uint32_t *arr) {
+    free(arr);
+}
+
 uint32_t right_shift(uint32_t range, uint32_t *seed) {
     uint64_t random32bit, multiresult;
     uint32_t leftover, threshold;
@@ -53,3 +57,43 @@ void shuf(uint32_t *arr, uint32_t size, uint32_t seed) {
     }
 }
 
+
+// A keyed bijection over [0, max_idx], for unique IDs in ranges too large to
+// fill and shuffle: a Feistel network over the smallest even number of bits
+// that covers the range, cycle-walking any outputs that fall outside of it.
+// This must stay in step with PermutationAllocator.permute() in utilities.py.
+
+#define FEISTEL_ROUNDS 4
+
+static uint64_t mix(uint64_t z) {
+    z = (z ^ (z >> 30)) * 0xBF58476D1CE4E5B9ULL;
+    z = (z ^ (z >> 27)) * 0x94D049BB133111EBULL;
+    return z ^ (z >> 31);
+}
+
+static uint64_t feistel(uint64_t x, uint32_t half_bits, const uint64_t *keys) {
+    uint64_t mask = (1ULL << half_bits) - 1;
+    uint64_t left = x >> half_bits;
+    uint64_t right = x & mask;
+    for (int i = 0; i < FEISTEL_ROUNDS; i++) {
+        uint64_t tmp = right;
+        right = left ^ (mix(right + keys[i]) & mask);
+        left = tmp;
+    }
+    return (left << half_bits) | right;
+}
+
+uint64_t permute(uint64_t idx, uint64_t max_idx, uint32_t half_bits, const uint64_t *keys) {
+    uint64_t x = feistel(idx, half_bits, keys);
+    while (x > max_idx) {
+        x = feistel(x, half_bits, keys);
+    }
+    return x;
+}
+
+void permute_fill(uint64_t *arr, uint64_t start, uint32_t size, uint64_t max_idx,
+                  uint32_t half_bits, const uint64_t *keys) {
+    for (uint32_t i = 0; i < size; i++) {
+        arr[i] = permute(start + i, max_idx, half_bits, keys);
+    }
+}
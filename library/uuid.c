@@ -1,30 +1,79 @@
-#include <stdbool.h>
 #include <stdint.h>
 #include <stdlib.h>
+#include <string.h>
+#include <time.h>
 #include <uuid/uuid.h>
 
-#define UUID_STR_LEN 37
+#define UUID_BIN_LEN 16
+#define UUID_TEXT_LEN 36
 
-#define lowercaseuuid true
+static const char hex_digits[] = "0123456789abcdef";
 
-char **fill_array (uint32_t size, bool use_v4) {
-    char **arr = calloc(size, sizeof(char *));
-    uuid_t binuuid;
-    if (!arr) {
-        return NULL;
+// UUIDv7 state, so that UUIDs made in the same millisecond are still ordered
+static uint64_t v7_last_ms = 0;
+static uint16_t v7_counter = 0;
+
+static void uuid_generate_v7(uint8_t *out) {
+    struct timespec ts;
+    uint64_t ms;
+    clock_gettime(CLOCK_REALTIME, &ts);
+    ms = (uint64_t) ts.tv_sec * 1000 + ts.tv_nsec / 1000000;
+    // random bits for rand_a and rand_b, the rest is overwritten below
+    uuid_generate_random(out);
+    if (ms > v7_last_ms) {
+        v7_last_ms = ms;
+        // start the counter at a random point, leaving room for it to increase
+        v7_counter = ((out[6] & 0x07) << 8) | out[7];
+    } else {
+        v7_counter++;
+        // if the 12-bit counter overflows, borrow from the next millisecond
+        if (v7_counter > 0x0FFF) {
+            v7_last_ms++;
+            v7_counter = 0;
+        }
     }
-    if (use_v4) {
-        for (uint32_t i = 0; i < size; i++) {
-            arr[i] = calloc(UUID_STR_LEN, sizeof(char));
-            uuid_generate_random(binuuid);
-            uuid_unparse_lower(binuuid, arr[i]);
+    for (int i = 0; i < 6; i++) {
+        out[i] = (uint8_t) (v7_last_ms >> (8 * (5 - i)));
+    }
+    out[6] = 0x70 | ((v7_counter >> 8) & 0x0F);
+    out[7] = v7_counter & 0xFF;
+    out[8] = (out[8] & 0x3F) | 0x80;
+}
+
+// Writes size binary UUIDs of the given version (1, 4, or 7) into the
+// contiguous buffer arr, which must hold size * UUID_BIN_LEN bytes.
+int fill_uuids(uint8_t *arr, uint32_t size, int version) {
+    for (uint32_t i = 0; i < size; i++) {
+        uint8_t *out = arr + (size_t) i * UUID_BIN_LEN;
+        switch (version) {
+            case 1:
+                uuid_generate_time(out);
+                break;
+            case 4:
+                uuid_generate_random(out);
+                break;
+            case 7:
+                uuid_generate_v7(out);
+                break;
+            default:
+                return -1;
         }
-    } else {
-        for (uint32_t i = 0; i < size; i++) {
-            arr[i] = calloc(UUID_STR_LEN, sizeof(char));
-            uuid_generate_time(binuuid);
-            uuid_unparse_lower(binuuid, arr[i]);
+    }
+    return 0;
+}
+
+// Formats size binary UUIDs from arr as lowercase text into out, which must
+// hold size * UUID_TEXT_LEN chars. Entries are not NUL-terminated.
+void format_uuids(const uint8_t *arr, char *out, uint32_t size) {
+    for (uint32_t i = 0; i < size; i++) {
+        const uint8_t *in = arr + (size_t) i * UUID_BIN_LEN;
+        char *str = out + (size_t) i * UUID_TEXT_LEN;
+        for (int j = 0; j < UUID_BIN_LEN; j++) {
+            if (j == 4 || j == 6 || j == 8 || j == 10) {
+                *str++ = '-';
+            }
+            *str++ = hex_digits[in[j] >> 4];
+            *str++ = hex_digits[in[j] & 0x0F];
         }
     }
-    return arr;
 }
@@ -0,0 +1,37 @@
+from unittest.mock import patch
+
+import pytest
+
+from gensql.generator import Generator
+from gensql.runner import Runner
+from gensql.validator import Validator
+from utilities import utilities
+
+
+@pytest.fixture
+def make_runner(tmp_path):
+    """
+    Returns a function that builds a Runner from a schema and a command line,
+    the way gensql.py does, but writing its files to tmp_path rather than to
+    schema_outputs/.
+    """
+
+    def make_runner(schema: dict, tbl_name: str, *argv: str) -> Runner:
+        with patch("sys.argv", ["gensql.py", "--output-dir", str(tmp_path), *argv]):
+            args = utilities.Args().make_args()
+        Validator(args).validate_schema(schema)
+        g = Generator(args)
+        tbl_create, tbl_cols = g.mysql(
+            schema, tbl_name, args.drop_table, args.defer_indexes
+        )
+        unique_cols = [x for x in tbl_cols if tbl_cols[x].get("unique")]
+        tbl_indexes = ""
+        if args.defer_indexes and "postgres" in args.filetype:
+            tbl_indexes = g.postgres_indexes(tbl_name, unique_cols)
+        elif args.defer_indexes:
+            tbl_indexes = g.mysql_indexes(tbl_name, unique_cols)
+        return Runner(
+            args, schema, tbl_name, tbl_cols, tbl_create, unique_cols, tbl_indexes
+        )
+
+    return make_runner
@@ -0,0 +1,72 @@
+from uuid import UUID
+
+import pytest
+
+from utilities.utilities import Allocator, PermutationAllocator, UUIDAllocator
+
+
+def test_allocate_unique():
+    a = Allocator(0, 1000, shuffle=True)
+    ids = [a.allocate() for _ in range(1000)]
+    assert sorted(ids) == list(range(1, 1001))
+    assert a.allocate() is None
+
+
+def test_allocate_many_cycles():
+    a = Allocator(0, 10, cycle=True)
+    assert a.allocate_many(25) == list(range(1, 11)) * 2 + list(range(1, 6))
+
+
+def test_allocate_many_exhausted():
+    a = Allocator(0, 3)
+    assert a.allocate_many(5) == [1, 2, 3, None, None]
+
+
+def test_seek_same_seed():
+    a = Allocator(0, 100, shuffle=True, seed=42)
+    b = Allocator(0, 100, shuffle=True, seed=42)
+    ids = a.allocate_many(100)
+    b.seek(40, 20)
+    assert b.allocate_many(20) == ids[40:60]
+    assert b.allocate() is None
+
+
+def test_ranged_array():
+    a = Allocator(5, 10, ranged_arr=True)
+    assert a.allocate_many(5) == [5, 6, 7, 8, 9]
+
+
+@pytest.mark.parametrize("num", [1, 2, 7, 1000, 4097])
+def test_permutation_is_bijective(num):
+    a = PermutationAllocator(0, num, shuffle=True)
+    ids = a.allocate_many(num)
+    assert sorted(ids) == list(range(1, num + 1))
+    assert a.allocate() is None
+
+
+def test_permutation_random_access():
+    a = PermutationAllocator(0, 2**40, shuffle=True, seed=42)
+    ids = a.allocate_many(100)
+    assert [a[i] for i in range(100)] == ids
+    b = PermutationAllocator(0, 2**40, shuffle=True, seed=42)
+    b.seek(2**39)
+    assert b.allocate() == a[2**39]
+
+
+def test_permutation_full_range():
+    a = PermutationAllocator(-(2**63), 2**63, ranged_arr=True, shuffle=True)
+    assert all(-(2**63) <= x < 2**63 for x in a.allocate_many(1000))
+
+
+@pytest.mark.parametrize("version", [1, 4, 7])
+def test_uuid_versions(version):
+    a = UUIDAllocator(25000, version)
+    uuids = a.allocate_many(25000)
+    assert len(set(uuids)) == 25000
+    assert all(str(UUID(u)) == u and UUID(u).version == version for u in uuids[:100])
+    assert a.allocate() is None
+
+
+def test_uuid_v7_is_ordered():
+    uuids = UUIDAllocator(25000, 7).allocate_many(25000, binary=True)
+    assert uuids == sorted(uuids)
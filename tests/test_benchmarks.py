@@ -0,0 +1,41 @@
+from benchmarks.run import ROOT, compare, make_cases, run_case
+
+
+def test_make_cases():
+    cases = dict(make_cases(["users.json"], [1000], ["csv", "mysql"]))
+    # --no-chunk only applies to SQL
+    assert len(cases) == 3 + 4
+    assert cases["users.json -n 1000 -f mysql --no-chunk"] == [
+        "-i",
+        "schema_inputs/users.json",
+        "-n",
+        "1000",
+        "-f",
+        "mysql",
+        "--no-chunk",
+    ]
+
+
+def test_compare():
+    ok = {"status": "ok", "rows_per_second": 1000.0, "peak_rss_bytes": 100}
+    baseline = {"same": ok, "slower": ok, "larger": ok, "failing": ok}
+    results = {
+        "same": {**ok, "rows_per_second": 950.0},
+        "slower": {**ok, "rows_per_second": 800.0},
+        "larger": {**ok, "peak_rss_bytes": 150},
+        "failing": {"status": "failed", "error": "boom"},
+        "new": ok,
+    }
+    assert compare(results, baseline, 0.1) == ["slower", "larger", "failing"]
+
+
+def test_run_case():
+    before = set((ROOT / "schema_outputs").iterdir())
+    result = run_case(["-i", "schema_inputs/users.json", "-n", "1000"], 1)
+    assert result["status"] == "ok"
+    assert result["rows_per_second"] > 0 and result["peak_rss_bytes"] > 0
+    # the output went to a temporary directory
+    assert set((ROOT / "schema_outputs").iterdir()) == before
+    failed = run_case(["-i", "schema_inputs/broken.json", "-n", "1000"], 1)
+    assert failed["status"] == "failed"
+    assert "SchemaValidationError" in failed["error"]
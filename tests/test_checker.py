@@ -0,0 +1,15 @@
+from gensql.checker import BloomChecker
+
+
+def test_bloom_checker_is_exact():
+    # a tiny filter is nearly all positives, so this exercises the on-disk set
+    for max_memory in (64, 1024**2):
+        checker = BloomChecker(max_memory, 20000)
+        try:
+            for i in range(20000):
+                assert f"user_{i}@example.com" not in checker
+                checker.add(f"user_{i}@example.com")
+            assert all(f"user_{i}@example.com" in checker for i in range(0, 20000, 7))
+            assert not any(f"other_{i}@example.com" in checker for i in range(2000))
+        finally:
+            checker.close()
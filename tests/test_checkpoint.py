@@ -0,0 +1,91 @@
+import gzip
+from pathlib import Path
+import pickle
+from unittest.mock import patch
+
+import pytest
+
+from gensql.checkpoint import Checkpoint
+from gensql.checker import LoggedSet
+from gensql.runner import Runner
+
+SCHEMA = {
+    "id": {"type": "int", "nullable": "false"},
+    "first_name": {"type": "varchar", "width": "255", "nullable": "false"},
+    "last_name": {"type": "varchar", "width": "255", "nullable": "false"},
+    "email": {"type": "varchar", "width": "255", "nullable": "false", "unique": "true"},
+    "score": {"type": "double", "nullable": "false"},
+    "created_at": {"type": "timestamp", "nullable": "false"},
+}
+
+
+@pytest.fixture
+def checkpoint_runner(make_runner):
+    def checkpoint_runner(name: str, *argv: str) -> Runner:
+        argv = ("-n", "45000", "-o", name, "--seed", "42", "-q", *argv)
+        return make_runner(SCHEMA, "checkpoint_test", *argv)
+
+    return checkpoint_runner
+
+
+def read_output(path: Path) -> bytes:
+    # a checkpoint ends a compressed block early, so only the contents match
+    if path.suffix == ".gz":
+        return gzip.decompress(path.read_bytes())
+    return path.read_bytes()
+
+
+@pytest.mark.parametrize(
+    "extra",
+    [[], ["--compress", "gzip", "--max-packet", "1M"], ["--unique-memory", "64K"]],
+)
+def test_resume_matches_uninterrupted_run(checkpoint_runner, tmp_path, extra):
+    state = tmp_path / "checkpoint" / "state.json"
+    checkpoint = ["--checkpoint-dir", str(state.parent), "--checkpoint-every", "20000"]
+    full = Path(checkpoint_runner("ckpt_full", *extra).run())
+
+    r = checkpoint_runner("ckpt_resumed", *extra, *checkpoint)
+    make_chunk = r.make_chunk
+    calls = []
+
+    def fail_on_fourth_chunk(vals):
+        calls.append(vals)
+        if len(calls) == 4:
+            raise KeyboardInterrupt
+        return make_chunk(vals)
+
+    with patch.object(r, "make_chunk", fail_on_fourth_chunk):
+        with pytest.raises(KeyboardInterrupt):
+            r.run()
+    assert state.exists()
+
+    resumed = Path(
+        checkpoint_runner("ckpt_resumed", *extra, *checkpoint, "--resume").run()
+    )
+    assert read_output(resumed) == read_output(full)
+    # the checkpoint is removed once the run is done
+    assert not state.exists()
+
+
+def test_checkpoint_saves_only_new_values(checkpoint_runner, tmp_path):
+    args = checkpoint_runner("ckpt_unused").args
+    checkpoint = Checkpoint(tmp_path)
+    seen_rows = {"id": LoggedSet(), "email": LoggedSet()}
+    for val in [1, 2, 2]:
+        seen_rows["id"].add(val)
+    checkpoint.save(args, {}, 4, 0, 0, seen_rows)
+    seen_rows["id"].add(3)
+    seen_rows["email"].add(1)
+    checkpoint.save(args, {}, 5, 0, 0, seen_rows)
+    state = checkpoint.load(args)
+    with open(checkpoint.seen_log, "rb") as f:
+        assert [pickle.load(f), pickle.load(f)] == [
+            {"id": [1, 2], "email": []},
+            {"id": [3], "email": [1]},
+        ]
+    # as if the run were interrupted while saving the next one
+    seen_rows["id"].add(4)
+    checkpoint.save(args, {}, 6, 0, 0, seen_rows)
+    restored = {"id": LoggedSet(), "email": LoggedSet()}
+    assert checkpoint.restore_seen(state, restored) == {"id": {1, 2, 3}, "email": {1}}
+    assert checkpoint.seen_log.stat().st_size == state["seen"]["log_size"]
@@ -0,0 +1,62 @@
+import pytest
+
+import gensql.runner
+from utilities.constants import DEFAULT_INSERT_CHUNK_SIZE
+
+SCHEMA = {
+    "id": {
+        "type": "int",
+        "nullable": "false",
+        "primary_key": "true",
+        "order": "monotonic",
+    },
+    "user_id": {"type": "bigint", "nullable": "false", "unique": "true"},
+    "first_name": {"type": "varchar", "width": "255", "nullable": "false"},
+    "last_name": {"type": "varchar", "width": "255", "nullable": "false"},
+    "email": {"type": "varchar", "width": "255", "nullable": "false"},
+    "created_at": {"type": "timestamp", "nullable": "false"},
+}
+
+
+@pytest.fixture(params=["numpy", "random.choices"])
+def make_rows(request, make_runner, monkeypatch):
+    """
+    Returns a function that makes the raw rows of a table, drawing from its
+    pools with NumPy, or with random.choices as if NumPy weren't installed.
+    """
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(gensql.runner, "np", None)
+
+    def make_rows(*argv: str):
+        r = make_runner(SCHEMA, "columns_test", "--seed", "3", *argv)
+        return r, [chunk for chunk in r.make_chunks(True, raw=True)]
+
+    return make_rows
+
+
+def test_bulk_draws_are_valid(make_rows):
+    r, chunks = make_rows("-n", "2000")
+    rows = [row for chunk in chunks for row in chunk]
+    assert len(rows) == 2000
+    assert all(len(row) == len(SCHEMA) for row in rows)
+    first_names, last_names = set(r.first_names), set(r.last_names)
+    for _, _, first, last, email, _ in rows:
+        assert first in first_names
+        assert last in last_names
+        assert "@" in email
+    for pool in [list(r.first_names), r.first_names]:
+        picked = r.choices(pool, 500)
+        assert len(picked) == 500
+        assert set(picked) <= first_names
+
+
+def test_no_rows_lost_between_chunks(make_rows):
+    num = DEFAULT_INSERT_CHUNK_SIZE + 1
+    _, chunks = make_rows("-n", str(num))
+    assert [len(chunk) for chunk in chunks] == [DEFAULT_INSERT_CHUNK_SIZE, 1]
+    rows = [row for chunk in chunks for row in chunk]
+    assert [row[0] for row in rows] == list(range(1, num + 1))
+    # each chunk's unique IDs are its own slice of them, shuffled
+    assert sorted(row[1] for row in rows) == list(range(1, num + 1))
@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+from pathlib import Path
+import struct
+from uuid import UUID
+
+import pytest
+
+from exceptions.exceptions import UnsupportedCopyTypeError
+from utilities.constants import PG_EPOCH, PGCOPY_HEADER, PGCOPY_TRAILER
+
+SCHEMA = {
+    "id": {"type": "int", "nullable": "false"},
+    "uuid": {"type": "binary", "width": "16", "nullable": "false"},
+    "first_name": {"type": "varchar", "width": "255", "nullable": "false"},
+    "created_at": {"type": "timestamp", "nullable": "false"},
+}
+
+
+COPY_ARGS = ("-n", "100", "-f", "postgres-copy")
+
+
+def test_copy_text_escapes(make_runner):
+    r = make_runner(SCHEMA, "copy_test", *COPY_ARGS)
+    r.make_copy_header()
+    rows = r.make_copy_chunk(
+        [(1, b"\x00" * 16, "tab\there\\", "2000-01-01 00:00:00"), (None,) * 4]
+    )
+    assert rows[0] == "1\t\\\\x" + "00" * 16 + "\ttab\\there\\\\\t2000-01-01 00:00:00\n"
+    assert rows[1] == "\\N\t\\N\t\\N\t\\N\n"
+    assert r.make_copy_footer() == ["\\.\n"]
+
+
+def test_copy_binary_round_trip(make_runner):
+    r = make_runner(SCHEMA, "copy_test", *COPY_ARGS, "--copy-binary")
+    data = b"".join(r.make_copy_header())
+    chunks = list(r.make_chunks(has_timestamp=True, raw=True))
+    for chunk in chunks:
+        data += b"".join(r.make_copy_chunk(chunk))
+    data += b"".join(r.make_copy_footer())
+    assert data.startswith(PGCOPY_HEADER) and data.endswith(PGCOPY_TRAILER)
+
+    pos = len(PGCOPY_HEADER)
+    decoded = []
+    while (num_fields := struct.unpack_from(">h", data, pos)[0]) != -1:
+        pos += 2
+        fields = []
+        for _ in range(num_fields):
+            (size,) = struct.unpack_from(">i", data, pos)
+            fields.append(data[pos + 4 : pos + 4 + size])
+            pos += 4 + size
+        decoded.append(fields)
+    rows = [row for chunk in chunks for row in chunk]
+    assert len(decoded) == len(rows) == 100
+    for (id_, uuid, name, created_at), fields in zip(rows, decoded):
+        assert struct.unpack(">i", fields[0])[0] == id_
+        assert fields[1] == uuid and len(uuid) == 16
+        assert fields[2].decode() == name
+        micros = struct.unpack(">q", fields[3])[0]
+        # the same time the text format would have written
+        (text,) = r.timestamps.format([created_at])
+        assert PG_EPOCH + timedelta(microseconds=micros) == datetime.fromisoformat(text)
+
+
+def test_copy_writes_ddl(make_runner, tmp_path):
+    r = make_runner(SCHEMA, "copy_test", *COPY_ARGS, "-o", "copy_ddl", "-q")
+    data = Path(r.run()).read_text()
+    assert (tmp_path / "tbl_copy_test_create.sql").read_text() == r.tbl_create
+    assert "CREATE TABLE" not in data
+
+
+def test_copy_binary_uuid_and_bigint(make_runner):
+    schema = {
+        "id": {"type": "bigint unsigned", "nullable": "false"},
+        "uuid": {"type": "char", "width": "36", "nullable": "false"},
+    }
+    r = make_runner(schema, "copy_test", "-n", "10", "-f", "postgres-copy")
+    r.args.copy_binary = True
+    r.make_copy_header()
+    value = "0190a6f4-4b8e-7c3a-9f2d-1e5b6c7d8e9f"
+    row = r.make_copy_chunk([(2**63 - 1, value)])[0]
+    assert row[-20:] == struct.pack(">i", 16) + UUID(value).bytes
+    # above a Postgres bigint
+    r._value_counts["id"] = 2**63
+    with pytest.raises(UnsupportedCopyTypeError):
+        r.make_copy_header()
@@ -0,0 +1,103 @@
+from argparse import Namespace
+from collections import Counter
+from pathlib import Path
+import random
+from unittest.mock import Mock
+
+import pytest
+
+from exceptions.exceptions import SchemaValidationError
+from gensql.distributions import AliasSampler, parse_distribution
+from gensql.validator import Validator
+
+SCHEMA = {
+    "id": {
+        "type": "int unsigned",
+        "nullable": "false",
+        "primary_key": "true",
+        "order": "monotonic",
+    },
+    "customer_id": {
+        "type": "int unsigned",
+        "nullable": "false",
+        "distribution": "zipf",
+        "distinct": "500",
+    },
+    "first_name": {
+        "type": "varchar",
+        "width": "255",
+        "nullable": "false",
+        "distribution": "hotset(10, 90)",
+    },
+    "last_name": {"type": "varchar", "width": "255", "nullable": "false"},
+    "city": {"type": "varchar", "width": "255", "nullable": "false", "distinct": "5"},
+}
+
+
+@pytest.mark.parametrize(
+    "spec, share",
+    [("zipf(2)", 1 / sum(1 / r**2 for r in range(1, 101))), ("hotset(10, 90)", 0.9)],
+)
+def test_alias_sampler(spec, share):
+    random.seed(1)
+    counts = Counter(AliasSampler.from_distribution(spec, 100).sample(100000))
+    assert set(counts) <= set(range(100))
+    # the most common value for zipf, and the hot 10% for hotset
+    if spec.startswith("zipf"):
+        top = counts[0]
+    else:
+        top = sum(n for _, n in counts.most_common(10))
+    assert top / 100000 == pytest.approx(share, abs=0.01)
+
+
+def test_parse_distribution():
+    assert parse_distribution("zipf") == ("zipf", (1.0,))
+    assert parse_distribution("hotset(5)") == ("hotset", (5.0, 80.0))
+    for spec in ["pareto", "zipf(0)", "hotset(10, 100)", "normal(1, 2)"]:
+        with pytest.raises(ValueError):
+            parse_distribution(spec)
+
+
+def test_skewed_columns(make_runner):
+    def make_rows(workers: str) -> list[tuple]:
+        argv = ["-n", "20000", "--seed", "5", "-w", workers]
+        r = make_runner(SCHEMA, "distribution_test", *argv)
+        return [row for chunk in r.make_chunks(False, raw=True) for row in chunk]
+
+    rows = make_rows("1")
+    _, customers, firsts, lasts, cities = zip(*rows)
+    customers = Counter(customers)
+    assert set(customers) <= set(range(1, 501))
+    # the smallest IDs are the most common
+    assert customers.most_common(1)[0][0] == 1
+    num_hot = round(len(Path("content/first_names.txt").read_text().splitlines()) / 10)
+    hot = sum(n for _, n in Counter(firsts).most_common(num_hot))
+    assert hot / len(rows) > 0.8
+    assert len(set(cities)) == 5
+    # unskewed columns are still spread out
+    assert len(set(lasts)) > 1000
+    assert make_rows("3") == rows
+
+
+@pytest.mark.parametrize(
+    "schema, error",
+    [
+        ({"a": {"type": "int", "distribution": "pareto"}}, "must be one of"),
+        ({"a": {"type": "text", "distribution": "zipf"}}, "not a valid option"),
+        ({"a": {"type": "int", "unique": "true", "distinct": "5"}}, "be unique"),
+        ({"a": {"type": "int", "distinct": "0"}}, "positive integer"),
+        (
+            {
+                "city": {"type": "varchar", "width": "64", "distinct": "5"},
+                "country": {"type": "varchar", "width": "64", "distribution": "zipf"},
+            },
+            "only one of them",
+        ),
+    ],
+)
+def test_invalid_distribution(schema, error, capsys):
+    mock_args = Mock(spec=Namespace)
+    mock_args.num = 1000
+    with pytest.raises(SchemaValidationError):
+        Validator(mock_args).validate_schema(schema)
+    assert error in capsys.readouterr().out
@@ -0,0 +1,128 @@
+from pathlib import Path
+import sqlite3
+import subprocess
+import sys
+from unittest.mock import Mock, patch
+
+import pytest
+
+from gensql.generator import Generator
+from gensql.sink import make_sink
+
+SCHEMA = {
+    "id": {
+        "type": "int unsigned",
+        "nullable": "false",
+        "primary_key": "true",
+        "unique": "true",
+    },
+    "email": {
+        "type": "varchar",
+        "width": "255",
+        "nullable": "false",
+        "unique": "true",
+    },
+}
+
+
+def test_mysql_indexes():
+    g = Generator(None)
+    tbl_create, _ = g.mysql(SCHEMA, "index_test", defer_indexes=True)
+    assert "PRIMARY KEY (`id`)\n)" in tbl_create
+    assert "UNIQUE" not in tbl_create
+    assert g.mysql_indexes("index_test", ["id", "email"]) == (
+        "ALTER TABLE `index_test`\n"
+        "  ADD UNIQUE KEY id (`id`),\n"
+        "  ADD UNIQUE KEY email (`email`);\n"
+    )
+    assert g.mysql_indexes("index_test", []) == ""
+
+
+def test_postgres_indexes():
+    g = Generator(None)
+    assert g.postgres_indexes("index_test", ["id", "email"]) == (
+        'ALTER TABLE "index_test"\n  ADD UNIQUE ("id"),\n  ADD UNIQUE ("email");\n'
+    )
+    assert g.postgres_indexes("index_test", []) == ""
+
+
+INDEX_ARGS = ("-n", "2500", "--defer-indexes", "-q")
+
+
+def test_indexes_after_commit(make_runner):
+    r = make_runner(SCHEMA, "index_test", *INDEX_ARGS, "-o", "index_test")
+    sql = Path(r.run()).read_text()
+    assert sql.index("CREATE TABLE") < sql.index("INSERT INTO")
+    assert sql.rindex("COMMIT;") < sql.index("ALTER TABLE") < sql.index("UNIQUE KEY")
+    assert sql.endswith(r.tbl_indexes)
+
+
+def test_indexes_file_for_split(make_runner, tmp_path):
+    argv = ["-f", "csv", "-o", "index_test", "--split-rows", "1000"]
+    r = make_runner(SCHEMA, "index_test", *INDEX_ARGS, *argv)
+    r.run()
+    assert (tmp_path / "tbl_index_test_indexes.sql").read_text() == r.tbl_indexes
+    script = (tmp_path / "index_test.load.sh").read_text()
+    subprocess.run(["bash", "-n"], input=script, text=True, check=True)
+    # the keys are only added if every part loaded
+    load, add_indexes = script.split("\n\n# the unique keys")
+    assert load.endswith("|| exit")
+    assert add_indexes.endswith('mysql "$@" < tbl_index_test_indexes.sql\n')
+
+
+@pytest.mark.parametrize("filetype", ["postgres", "postgres-copy"])
+def test_indexes_file_for_postgres(make_runner, tmp_path, filetype):
+    argv = ["-f", filetype, "-o", "index_test"]
+    r = make_runner(SCHEMA, "index_test", *INDEX_ARGS, *argv)
+    data = Path(r.run()).read_bytes()
+    indexes = (tmp_path / "tbl_index_test_indexes.sql").read_text()
+    assert indexes == r.tbl_indexes
+    assert indexes.startswith('ALTER TABLE "index_test"\n  ADD UNIQUE ("id")')
+    # they're only added once the data is loaded
+    assert b"ALTER TABLE" not in data
+
+
+def test_postgres_sink_indexes():
+    cursor = Mock()
+    with patch.dict(sys.modules, {"psycopg": Mock()}):
+        sink = make_sink(
+            "postgresql://localhost/db",
+            "users",
+            {"email": {"type": "varchar (255)"}},
+            "",
+            ["id", "email"],
+            tbl_indexes="deferred",
+        )
+    sink.create_indexes(cursor)
+    cursor.execute.assert_called_once_with(
+        'ALTER TABLE "users" ADD UNIQUE ("id"), ADD UNIQUE ("email")'
+    )
+
+
+def test_sqlite_sink_defers_indexes(tmp_path):
+    db = tmp_path / "gensql.db"
+    tbl_cols = {"id": {"type": "int"}, "email": {"type": "varchar (255)"}}
+    rows = [(1, "a@example.com"), (2, "b@example.com")]
+    sink = make_sink(
+        f"sqlite:///{db}", "users", tbl_cols, "", ["email"], tbl_indexes="deferred"
+    )
+    with sink:
+        sink.write(rows)
+    conn = sqlite3.connect(db)
+    assert conn.execute("SELECT * FROM users ORDER BY id").fetchall() == rows
+    with pytest.raises(sqlite3.IntegrityError):
+        conn.execute("INSERT INTO users VALUES (3, 'a@example.com')")
+    # a duplicate that got in fails the index, not the load
+    sink = make_sink(
+        f"sqlite:///{tmp_path / 'dupes.db'}",
+        "users",
+        tbl_cols,
+        "",
+        ["email"],
+        tbl_indexes="deferred",
+    )
+    with pytest.raises(sqlite3.IntegrityError):
+        with sink:
+            sink.write([(1, "dupe@example.com"), (2, "dupe@example.com")])
+    conn = sqlite3.connect(tmp_path / "dupes.db")
+    assert conn.execute("SELECT COUNT(*) FROM users").fetchone() == (2,)
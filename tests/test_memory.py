@@ -0,0 +1,16 @@
+import pytest
+
+from benchmarks.run import run_case
+
+
+@pytest.mark.parametrize("argv", [["--no-check"], ["--unique-memory", "1M"]])
+def test_peak_memory_is_bounded(argv):
+    # rows are written a chunk at a time, so ten times as many shouldn't need
+    # much more memory, as long as the seen unique values are bounded too
+    def peak_rss(num: int) -> int:
+        args = ["-i", "schema_inputs/users.json", "-n", str(num), *argv]
+        result = run_case(args, 1)
+        assert result["status"] == "ok"
+        return result["peak_rss_bytes"]
+
+    assert peak_rss(200000) < peak_rss(20000) * 1.25
@@ -0,0 +1,53 @@
+from argparse import Namespace
+from unittest.mock import Mock
+
+import pytest
+
+from exceptions.exceptions import SchemaValidationError
+from gensql.validator import Validator
+
+# updated_at comes first, to check that it can be after a later column
+SCHEMA = {
+    "id": {
+        "type": "bigint unsigned",
+        "nullable": "false",
+        "primary_key": "true",
+        "order": "monotonic",
+    },
+    "updated_at": {"type": "timestamp", "nullable": "false", "after": "created_at"},
+    "created_at": {"type": "timestamp", "nullable": "false", "order": "monotonic"},
+    "account_id": {"type": "int unsigned", "nullable": "false", "unique": "true"},
+}
+
+
+@pytest.mark.parametrize("workers", ["1", "3"])
+def test_ordered_columns(make_runner, workers):
+    argv = ["-n", "25000", "--seed", "3", "-w", workers]
+    r = make_runner(SCHEMA, "ordering_test", *argv)
+    rows = [row for chunk in r.make_chunks(True, raw=True) for row in chunk]
+    ids, updated, created, accounts = zip(*rows)
+    assert list(ids) == list(range(1, 25001))
+    assert list(created) == sorted(created)
+    assert all(c <= u for c, u in zip(created, updated))
+    # the unique column is still shuffled, and unique
+    assert len(set(accounts)) == 25000 and list(accounts) != sorted(accounts)
+
+
+@pytest.mark.parametrize(
+    "schema, error",
+    [
+        ({"a": {"type": "timestamp", "after": "a"}}, "after itself"),
+        (
+            {"a": {"type": "timestamp", "after": "b"}, "b": {"type": "int"}},
+            "only be after another timestamp",
+        ),
+        ({"a": {"type": "text", "order": "monotonic"}}, "not a valid option"),
+        ({"a": {"type": "timestamp", "order": "sorted"}}, "must be one of"),
+    ],
+)
+def test_invalid_ordering(schema, error, capsys):
+    mock_args = Mock(spec=Namespace)
+    mock_args.num = 1000
+    with pytest.raises(SchemaValidationError):
+        Validator(mock_args).validate_schema(schema)
+    assert error in capsys.readouterr().out
@@ -0,0 +1,55 @@
+import os
+
+import pytest
+
+from gensql.pack import ReferencePack
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "source.txt"
+    path.write_text("a\n")
+    return path
+
+
+def test_pack_round_trip(tmp_path, source):
+    path = str(tmp_path / "test.pack")
+    sections = {
+        "names": ["Ada", "Zoë", "", "Grace"],
+        "empty": [],
+        "numbers": [str(i) for i in range(100)],
+    }
+    ReferencePack.write(path, sections, [str(source)])
+    with ReferencePack.load(path) as pack:
+        names = pack["names"]
+        assert len(names) == 4
+        assert names[1] == "Zoë"
+        assert names[-1] == "Grace"
+        assert names[1:3] == ["Zoë", ""]
+        assert list(names) == names.tolist() == sections["names"]
+        assert bytes(names.raw(1)) == "Zoë".encode()
+        assert names.take([3, 1, 1]) == ["Grace", "Zoë", "Zoë"]
+        # a small batch of a big section is looked up item by item
+        assert pack["numbers"].take([99, 5]) == ["99", "5"]
+        assert pack["empty"].tolist() == []
+        with pytest.raises(IndexError):
+            names[4]
+
+
+def test_stale_pack_is_ignored(tmp_path, source):
+    path = str(tmp_path / "test.pack")
+    ReferencePack.write(path, {"names": ["Ada"]}, [str(source)])
+    st = os.stat(source)
+    os.utime(source, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert ReferencePack.load(path) is None
+    assert ReferencePack.load(str(tmp_path / "missing.pack")) is None
+
+
+def test_build_matches_sources(tmp_path):
+    path = ReferencePack.build(str(tmp_path / "reference.pack"))
+    with ReferencePack.load(path) as pack:
+        for name in ["first_names", "last_names", "wordlist", "lorem_ipsum"]:
+            with open(f"content/{name}.txt") as f:
+                assert pack[name].tolist() == f.read().splitlines()
+        assert len(pack["cities"]) == len(pack["city_countries"])
+        assert len(pack["country_codes"]) == len(pack["countries"])
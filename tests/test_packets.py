@@ -0,0 +1,29 @@
+from utilities import utilities
+
+SCHEMA = {
+    "id": {"type": "int", "nullable": "false"},
+    "about": {"type": "text", "max_length": "1.0", "nullable": "false"},
+}
+
+
+def test_parse_size():
+    utils = utilities.Utilities()
+    assert utils.parse_size("512") == 512
+    assert utils.parse_size("64M") == 64 * 1024**2
+    assert utils.parse_size("1g") == 1024**3
+
+
+def test_max_packet_statements_fit(make_runner):
+    r = make_runner(SCHEMA, "packet_test", "-n", "2000", "--max-packet", "64K")
+    sql = "".join(r.make_header())
+    num_rows = 0
+    for vals in r.make_chunks(has_timestamp=False):
+        num_rows += len(vals)
+        sql += "".join(r.make_chunk(vals))
+    sql += "".join(r.make_footer())
+    body = sql.split("WRITE;\n", 1)[1].rsplit("COMMIT;\n", 1)[0]
+    stmts = [f"{stmt};\n" for stmt in body.split(";\n")[:-1]]
+    assert len(stmts) > 1
+    assert all(len(stmt.encode()) <= 64 * 1024 for stmt in stmts)
+    assert all(stmt.startswith("INSERT INTO `packet_test`") for stmt in stmts)
+    assert sum(stmt.count("\n(") for stmt in stmts) == num_rows == 2000
@@ -0,0 +1,42 @@
+import sqlite3
+
+import pytest
+
+# phone, country, and city in the reverse of the order they used to need
+SCHEMA = {
+    "id": {"type": "int", "nullable": "false"},
+    "phone": {"type": "varchar", "width": "255", "nullable": "false"},
+    "country": {"type": "varchar", "width": "255", "nullable": "false"},
+    "city": {"type": "varchar", "width": "255", "nullable": "false"},
+}
+PHONE_PREFIXES = {
+    "AU": "+61 ",
+    "DE": "+49 ",
+    "FR": "+33 ",
+    "GB": "+44 ",
+    "JP": "+81 ",
+    "KE": "+254 ",
+    "MX": "+52 ",
+    "UA": "+380 ",
+    "US": "+1 ",
+}
+
+
+@pytest.mark.parametrize("country", ["random", "gb", "us"])
+def test_city_country_and_phone_agree(make_runner, country):
+    argv = ["-n", "5000", "--seed", "1", "--country", country]
+    r = make_runner(SCHEMA, "places_test", *argv)
+    rows = list(zip(*r.make_columns(1, 5001, False, raw=True)))
+
+    conn = sqlite3.connect("db/gensql.db")
+    pairs = set(conn.execute("SELECT city, country FROM cities"))
+    codes = dict(conn.execute("SELECT country, code FROM countries"))
+    conn.close()
+    assert r.plan_cols == list(SCHEMA)
+    for _, phone, country_name, city in rows:
+        assert (city, country_name) in pairs
+        assert phone.startswith(PHONE_PREFIXES[codes[country_name]])
+        if country != "random":
+            assert codes[country_name] == country.upper()
+    if country == "random":
+        assert len({row[2] for row in rows}) > 1
@@ -0,0 +1,34 @@
+import io
+
+from gensql.profiler import Profiler
+
+SCHEMA = {
+    "id": {"type": "int", "nullable": "false"},
+    "first_name": {"type": "varchar", "width": "255", "nullable": "false"},
+}
+
+
+def test_profiler_counts_and_merges():
+    p = Profiler()
+    double = p.wrap("double", lambda vals: vals * 2)
+    assert double([1, 2]) == [1, 2, 1, 2]
+    assert p.stats["double"][1] == 4
+    stats = p.pop()
+    assert stats["double"][1] == 4 and p.stats["double"][1] == 0
+    p.merge(stats)
+    p.merge(stats)
+    assert p.stats["double"][1] == 8
+
+
+def test_runner_profile(make_runner):
+    r = make_runner(SCHEMA, "profile_test", "-n", "2500", "--profile")
+    out = r.profiler.wrap_file(io.StringIO())
+    for vals in r.make_chunks(has_timestamp=False):
+        out.writelines(r.make_chunk(vals))
+    stats = r.profiler.stats
+    for stage in ("generate id", "format first_name", "finish rows", "encode"):
+        assert stats[stage][1] == 2500
+    assert stats["write"][1] == len(out.getvalue())
+    report = io.StringIO()
+    r.profiler.report(2500, file=report)
+    assert "generate first_name" in report.getvalue()
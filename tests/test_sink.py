@@ -0,0 +1,73 @@
+import sqlite3
+from unittest.mock import Mock
+
+import pytest
+
+from exceptions.exceptions import UnsupportedRDBMSError
+from gensql.sink import Sink, SQLiteSink, make_sink
+
+TBL_COLS = {"id": {"type": "int"}, "email": {"type": "varchar (255)"}}
+
+
+def test_sqlite_sink_loads_batches(tmp_path):
+    db = tmp_path / "gensql.db"
+    rows = [(i, f"user_{i}@example.com") for i in range(1, 1001)]
+    sink = make_sink(f"sqlite:///{db}", "users", TBL_COLS, "", ["email"], batch_size=64)
+    assert isinstance(sink, SQLiteSink)
+    with sink:
+        for i in range(0, len(rows), 300):
+            sink.write(rows[i : i + 300])
+    assert sink.num_rows == len(rows)
+    conn = sqlite3.connect(db)
+    assert conn.execute("SELECT id, email FROM users ORDER BY id").fetchall() == rows
+
+
+def test_sqlite_sink_raises_loader_error(tmp_path):
+    db = tmp_path / "gensql.db"
+    sink = make_sink(f"sqlite:///{db}", "users", TBL_COLS, "", ["email"], batch_size=2)
+    with pytest.raises(sqlite3.IntegrityError):
+        with sink:
+            sink.write([(1, "dupe@example.com"), (2, "dupe@example.com")])
+    # nothing is committed when a loader fails
+    conn = sqlite3.connect(db)
+    assert conn.execute("SELECT COUNT(*) FROM users").fetchone() == (0,)
+
+
+class FailingSink(Sink):
+    """
+    A sink whose third connection, i.e. its second loader's, can't be made.
+    """
+
+    def connect(self):
+        if len(self.conns) == 2:
+            self.conns.append(None)
+            raise ConnectionError("refused")
+        self.conns.append(Mock())
+        return self.conns[-1]
+
+
+def test_sink_rolls_back_every_loader():
+    sink = FailingSink("fake://", "users", TBL_COLS, "", [], connections=3)
+    sink.conns = []
+    with pytest.raises(ConnectionError):
+        with sink:
+            sink.write([(i, f"user_{i}@example.com") for i in range(10000)])
+    loaders = [conn for conn in sink.conns[1:] if conn is not None]
+    assert len(loaders) == 2
+    # the healthy loaders close without committing
+    assert all(conn.close.called and not conn.commit.called for conn in loaders)
+
+
+def test_sqlite_sink_keeps_primary_key(tmp_path):
+    db = tmp_path / "gensql.db"
+    tbl_cols = {"id": {"type": "int", "pk": True}, "email": {"type": "text"}}
+    with make_sink(f"sqlite:///{db}", "users", tbl_cols, "", []) as sink:
+        sink.write([(1, "a@example.com")])
+    conn = sqlite3.connect(db)
+    pks = [row[1] for row in conn.execute("PRAGMA table_info(users)") if row[5]]
+    assert pks == ["id"]
+
+
+def test_unsupported_sink():
+    with pytest.raises(UnsupportedRDBMSError):
+        make_sink("oracle://localhost/db", "users", TBL_COLS, "", [])
@@ -0,0 +1,46 @@
+from pathlib import Path
+import random
+
+import pytest
+
+from gensql.sorter import ExternalSorter
+from utilities.constants import DEFAULT_INSERT_CHUNK_SIZE
+
+SCHEMA = {
+    "id": {
+        "type": "int unsigned",
+        "nullable": "false",
+        "primary_key": "true",
+        "unique": "true",
+    },
+    "first_name": {"type": "varchar", "width": "255", "nullable": "false"},
+    "created_at": {"type": "timestamp", "nullable": "false"},
+}
+
+
+@pytest.mark.parametrize("memory", [1024, 1024**3])
+def test_sorter_spills_and_merges(tmp_path, memory):
+    keys = random.Random(1).sample(range(10**6), 45000)
+    chunks = [
+        [(k, f"row {k}") for k in keys[i : i + 7000]] for i in range(0, 45000, 7000)
+    ]
+    sorter = ExternalSorter(memory, str(tmp_path))
+    out = list(sorter.sort(chunks))
+    assert [len(c) for c in out[:-1]] == [DEFAULT_INSERT_CHUNK_SIZE] * (len(out) - 1)
+    assert [row for c in out for row in c] == [f"row {k}" for k in sorted(keys)]
+    # everything fits in a gigabyte, so only the small cap spills
+    assert (sorter.num_spilled > 0) == (memory == 1024)
+    assert sorter.runs == []
+
+
+def test_sort_by_pk(make_runner):
+    def run(name: str, *extra: str) -> list[str]:
+        argv = ["-n", "30000", "-f", "csv", "-o", name, "--seed", "4", "-q"]
+        r = make_runner(SCHEMA, "sort_test", *argv, "--force", *extra)
+        return Path(r.run()).read_text().splitlines()[1:]
+
+    unsorted = run("sort_unsorted")
+    rows = run("sort_sorted", "--sort-by-pk", "--sort-memory", "1M")
+    ids = [int(row.split(",")[0]) for row in rows]
+    assert ids == sorted(ids) != [int(row.split(",")[0]) for row in unsorted]
+    assert sorted(rows) == sorted(unsorted)
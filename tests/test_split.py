@@ -0,0 +1,33 @@
+import hashlib
+import io
+import json
+from pathlib import Path
+
+SCHEMA = {
+    "id": {"type": "int", "nullable": "false"},
+    "first_name": {"type": "varchar", "width": "255", "nullable": "false"},
+}
+
+
+def test_split_rows(make_runner, tmp_path):
+    argv = ["-n", "2500", "-f", "csv", "-o", "split_test", "--split-rows", "1000", "-q"]
+    r = make_runner(SCHEMA, "split_test", *argv)
+    manifest = json.loads(Path(r.run()).read_text())
+    assert manifest["rows"] == 2500
+    assert [part["rows"] for part in manifest["parts"]] == [1000, 1000, 500]
+    for part in manifest["parts"]:
+        data = (tmp_path / part["file"]).read_bytes()
+        assert len(data) == part["bytes"]
+        assert hashlib.sha256(data).hexdigest() == part["sha256"]
+        # each part has its own CSV header
+        assert data.count(b"\n") == part["rows"] + 1
+    script = (tmp_path / "split_test.load.sh").read_text()
+    assert all(part["file"] in script for part in manifest["parts"])
+
+
+def test_load_help_for_stdout(make_runner):
+    r = make_runner(SCHEMA, "split_test", "-n", "10", "-f", "csv", "-o", "-")
+    help = io.StringIO()
+    # the rows are piped into mysql, so only it can read them
+    r.print_load_help("/dev/stdin", help, local=True)
+    assert "LOAD DATA LOCAL INFILE '/dev/stdin'" in help.getvalue()
@@ -0,0 +1,18 @@
+import pytest
+
+from exceptions.exceptions import OverwriteFileError
+
+SCHEMA = {
+    "id": {"type": "int", "nullable": "false", "primary_key": "true"},
+    "name": {"type": "varchar", "width": "32", "nullable": "false"},
+}
+
+
+def test_stdout_refuses_to_overwrite_ddl(make_runner, capfd):
+    argv = ["-n", "10", "-o", "-", "-q"]
+    make_runner(SCHEMA, "stdout_test", *argv).run()
+    assert "INSERT INTO" in capfd.readouterr().out
+    with pytest.raises(OverwriteFileError) as e:
+        make_runner(SCHEMA, "stdout_test", *argv).run()
+    assert e.value.filename.endswith("tbl_stdout_test_create.sql")
+    assert "tbl_stdout_test_create.sql" in e.value.msg
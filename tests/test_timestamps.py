@@ -0,0 +1,32 @@
+from datetime import datetime, timedelta
+import random
+
+from gensql.timestamps import Timestamps, to_epoch
+
+START = datetime(1995, 5, 23)
+END = datetime(2026, 10, 17)
+
+
+def test_format_matches_datetime():
+    t = Timestamps(START, END)
+    epochs = [t.start, t.end - 1, to_epoch(datetime(2000, 2, 29, 23, 59, 59))]
+    random.seed(1)
+    epochs += list(t.draw(1000))
+    assert t.format(epochs) == [
+        str(datetime(1970, 1, 1) + timedelta(seconds=int(e))) for e in epochs
+    ]
+    assert all(t.start <= e < t.end for e in epochs)
+
+
+def test_cache_round_trip(tmp_path):
+    path = tmp_path / "dates.bin"
+    with open(path, "wb") as f:
+        Timestamps(START, END).write_cache(f, 5000)
+    assert path.stat().st_size == 24 + 5000 * 8
+    # the range is the one the cache was made with
+    t = Timestamps(datetime(2020, 1, 1), datetime(2021, 1, 1), str(path))
+    assert (t.start, t.end) == (to_epoch(START), to_epoch(END))
+    assert len(t.cache) == 5000
+    assert all(t.start <= e < t.end for e in t.cache)
+    dates = t.format(t.draw(100))
+    assert all(START <= datetime.fromisoformat(d) < END for d in dates)
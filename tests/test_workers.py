@@ -0,0 +1,89 @@
+import pytest
+
+import gensql.runner
+from utilities.constants import DEFAULT_INSERT_CHUNK_SIZE
+
+SCHEMA = {
+    "id": {
+        "type": "int unsigned",
+        "nullable": "false",
+        "primary_key": "true",
+        "unique": "true",
+    },
+    "account_id": {"type": "bigint", "nullable": "false", "unique": "true"},
+    "uuid": {"type": "char", "width": "36", "nullable": "false"},
+    "first_name": {"type": "varchar", "width": "255", "nullable": "false"},
+    "created_at": {"type": "timestamp", "nullable": "false"},
+}
+UNIQUES = ["id", "account_id"]
+
+
+@pytest.fixture
+def make_chunks(make_runner):
+    def make_chunks(workers: str) -> list[list[tuple]]:
+        # a unique integer that a worker repeats fails the table-wide check
+        argv = ["-n", "45000", "--seed", "7", "-w", workers]
+        r = make_runner(SCHEMA, "workers_test", *argv)
+        return list(r.make_chunks(True, raw=True))
+
+    return make_chunks
+
+
+def without_uuids(chunks: list[list[tuple]]) -> list[list[tuple]]:
+    # UUIDs are always made fresh, whatever the seed
+    i = list(SCHEMA).index("uuid")
+    return [[row[:i] + row[i + 1 :] for row in chunk] for chunk in chunks]
+
+
+def test_workers_match_a_single_process(make_chunks):
+    chunks = without_uuids(make_chunks("1"))
+    assert len(chunks) > 4
+    assert without_uuids(make_chunks("4")) == chunks
+
+
+@pytest.mark.parametrize("col", UNIQUES)
+def test_workers_unique_values_are_disjoint(make_chunks, col):
+    i = list(SCHEMA).index(col)
+    chunks = [{row[i] for row in chunk} for chunk in make_chunks("4")]
+    assert sum(len(values) for values in chunks) == 45000
+    assert len(set().union(*chunks)) == 45000
+
+
+def test_unique_int_columns_are_checked_separately(make_runner):
+    # the same integers turn up in both columns, which is not a duplicate
+    r = make_runner(SCHEMA, "workers_test", "-n", "1000", "--seed", "7")
+    rows = [row for chunk in r.make_chunks(True, raw=True) for row in chunk]
+    for col in UNIQUES:
+        i = list(SCHEMA).index(col)
+        assert len({row[i] for row in rows}) == 1000
+
+
+def test_each_workers_unique_ids_are_disjoint(make_runner, monkeypatch):
+    # the pool's workers, run in this process so it can tell which made each chunk
+    monkeypatch.setattr(gensql.runner, "_worker_runner", None)
+    r = make_runner(SCHEMA, "workers_test", "-n", "45000", "--seed", "7")
+    workers = []
+    for _ in range(3):
+        gensql.runner._init_worker(
+            r.args,
+            r.schema,
+            r.tbl_name,
+            r.tbl_cols,
+            r.tbl_create,
+            r.unique_cols,
+            r.seeds,
+        )
+        workers.append(gensql.runner._worker_runner)
+    seen_rows = r.make_unique_checker()
+    made = [[] for _ in workers]
+    for n, start in enumerate(range(1, 45001, DEFAULT_INSERT_CHUNK_SIZE)):
+        stop = min(start + DEFAULT_INSERT_CHUNK_SIZE, 45001)
+        gensql.runner._worker_runner = workers[n % len(workers)]
+        cols, columns, _ = gensql.runner._make_rows_worker((start, stop, True, True))
+        # checked table-wide by the parent, as a pool's chunks are
+        made[n % len(workers)] += r.finish_rows(cols, columns, seen_rows, raw=True)
+    for col in UNIQUES:
+        i = list(SCHEMA).index(col)
+        ids = [{row[i] for row in rows} for rows in made]
+        assert sum(len(worker_ids) for worker_ids in ids) == 45000
+        assert set().union(*ids) == set(range(1, 45001))
@@ -0,0 +1,36 @@
+import gzip
+from io import BytesIO
+import lzma
+
+import pytest
+
+from gensql.writer import CompressedWriter
+
+
+@pytest.mark.parametrize(
+    "method, decompress", [("gzip", gzip.decompress), ("xz", lzma.decompress)]
+)
+def test_blocks_concatenate(tmp_path, method, decompress):
+    path = tmp_path / f"out.{method}"
+    lines = [f"({i},'row {i}'),\n" for i in range(20000)]
+    with CompressedWriter(path, "x", method, block_size=4096, threads=4) as f:
+        f.writelines(lines[:10000])
+        for line in lines[10000:]:
+            f.write(line)
+        f.write(b"binary too\n")
+    assert decompress(path.read_bytes()) == ("".join(lines) + "binary too\n").encode()
+
+
+def test_refuses_overwrite(tmp_path):
+    path = tmp_path / "out.gz"
+    path.touch()
+    with pytest.raises(FileExistsError):
+        CompressedWriter(path, "x")
+
+
+def test_open_file_left_open():
+    out = BytesIO()
+    with CompressedWriter(out, method="gzip") as f:
+        f.write("streamed\n")
+    assert not out.closed
+    assert gzip.decompress(out.getvalue()) == b"streamed\n"
@@ -1,3 +1,4 @@
+from datetime import datetime
 from string import ascii_lowercase
 
 ALLOWED_COLS = [
@@ -21,6 +22,8 @@ ALLOWED_COLS = [
 ]
 
 ALLOWED_UNIQUES = ["email"]
+# besides integers, the columns that can have a distribution or distinct option
+ALLOWED_SKEWED = ["city", "country", "first_name", "last_name"]
 
 # CITIES_COUNTRIES = {
 #    x.split(",")[0]: x.split(",")[1]
@@ -32,8 +35,15 @@ ALLOWED_UNIQUES = ["email"]
 #    for x in open("content/country_codes.txt").read().splitlines()
 # }
 
+# written by --generate-dates, and drawn from instead of the full range if it's there
+DATES_CACHE = "content/dates.bin"
+DATES_START = datetime(1995, 5, 23)
+
+DEFAULT_CHECKPOINT_ROWS = 1000000
+DEFAULT_COMPRESS_BLOCK_SIZE = 8 * 1024**2
 DEFAULT_INSERT_CHUNK_SIZE = 10000
 DEFAULT_MAX_FIELD_PCT = 0.15
+DEFAULT_SORT_MEMORY = 256 * 1024**2
 
 JSON_DEFAULT_KEYS = [f"{x}_key" for x in ascii_lowercase][::-1]
 JSON_OBJ_MAX_KEYS = 3
@@ -57,6 +67,41 @@ MYSQL_INT_MIN_MAX = {
     "MYSQL_MAX_BIGINT_UNSIGNED": ~-(2**64),
 }
 
+# statements run around a load, both in .sql files and by a --sink
+MYSQL_SESSION_SETUP = [
+    "SET @@time_zone = '+00:00'",
+    "SET @@autocommit = 0",
+    "SET @@unique_checks = 0",
+]
+MYSQL_SESSION_TEARDOWN = [
+    "SET @@autocommit = 1",
+    "SET @@unique_checks = 1",
+    "SET @@time_zone = (SELECT @@GLOBAL.time_zone)",
+]
+# where output files go, unless --output-dir is given
+OUTPUT_DIR = "schema_outputs"
+POSTGRES_SESSION_SETUP = ["SET TIME ZONE 'UTC'"]
+
+# built by --build-pack, and used instead of content/ and db/ when up to date
+REFERENCE_PACK = "content/reference.pack"
+
+# binary COPY: the file header (signature, flags, extension length), the trailer,
+# and the integer format for each type - there are no unsigned types in Postgres,
+# so those widen to the next size up to always fit
+PGCOPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + b"\x00" * 8
+PGCOPY_TRAILER = b"\xff\xff"
+PGCOPY_INT_FORMATS = {
+    "smallint": ">ih",
+    "smallint unsigned": ">ii",
+    "int": ">ii",
+    "int unsigned": ">iq",
+    "bigint": ">iq",
+    "bigint unsigned": ">iq",
+}
+# binary timestamps are microseconds since this
+PG_EPOCH = datetime(2000, 1, 1)
+PG_EPOCH_SECONDS = int((PG_EPOCH - datetime(1970, 1, 1)).total_seconds())
+
 PHONE_NUMBERS = {
     "au": lambda x: f"+61 02 {x[0:4]} {x[5:9]}",
     "de": lambda x: f"+49 030 {x[0:6]}-{x[6:8]}",
@@ -65,6 +110,6 @@ PHONE_NUMBERS = {
     "jp": lambda x: f"+81 03 {x[0:4]}-{x[4:8]}",
     "mx": lambda x: f"+52 55 {x[0:4]} {x[4:8]}",
     "ua": lambda x: f"+380 32 {x[0:3]}-{x[3:5]}-{x[5:7]}",
-    "uk": lambda x: f"+44 0131 {x[0:4]} {x[4:8]}",
+    "gb": lambda x: f"+44 0131 {x[0:4]} {x[4:8]}",
     "us": lambda x: f"+1 {x[0:3]}-{x[3:6]}-{x[6:10]}",
 }